@@ -0,0 +1,215 @@
+import json
+import logging
+from collections import defaultdict
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from .schemas import (
+    Conversation, Message, ConversationCreate,
+    MessageCreate, TitleGenerate, TitleResponse
+)
+from ..chat.conversation_service import ConversationService
+from ..database import AsyncSessionLocal, get_conn, get_db
+from ..models.dataset import Conversation as DBConversation, Message as DBMessage
+from .http_cache import json_etag_response
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# 定义依赖函数
+async def get_conversation_service(db: AsyncSession = Depends(get_db)) -> ConversationService:
+    return ConversationService(db)
+
+# 列表序列化器（模块级构建一次）
+_messages_adapter = TypeAdapter(List[Message])
+_conversations_adapter = TypeAdapter(List[Conversation])
+
+def _to_message_schema(message) -> Message:
+    """数据库消息转换为响应模型（数据来自数据库，跳过逐字段校验）"""
+    return Message.model_construct(
+        id=message.id,
+        conversation_id=message.conversation_id,
+        role=message.role,
+        content=message.content,
+        # 数据库中 citations 可能为 NULL
+        citations=message.citations or [],
+        created_at=message.created_at
+    )
+
+def _to_conversation_schema(conversation, messages: Optional[List[Message]] = None) -> Conversation:
+    """ORM 对话转换为响应模型（created_at 由 pydantic 序列化，messages 不走懒加载）"""
+    return Conversation(
+        id=conversation.id,
+        name=conversation.title,
+        workspace_id=conversation.workspace_id,
+        created_at=conversation.created_at,
+        messages=messages or []
+    )
+
+@router.get("/conversations/list", response_model=List[Conversation])
+async def list_conversations(
+    request: Request,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    with_messages: bool = Query(False, description="是否同时返回每个对话的消息"),
+    conn: AsyncConnection = Depends(get_conn)
+):
+    """获取对话列表（按最近消息时间倒序）"""
+    try:
+        # 只读接口，直接用 Core 查询需要的列
+        result = await conn.execute(
+            select(
+                DBConversation.id,
+                DBConversation.title,
+                DBConversation.workspace_id,
+                DBConversation.created_at
+            )
+            .order_by(
+                DBConversation.last_msg_sent_at.desc(),
+                DBConversation.created_at.desc()
+            )
+            .offset(skip)
+            .limit(limit)
+        )
+        conversations = result.all()
+
+        # 需要消息时一次 IN 查询取回本页所有对话的消息
+        messages_by_conversation = defaultdict(list)
+        if with_messages and conversations:
+            message_result = await conn.execute(
+                select(
+                    DBMessage.id,
+                    DBMessage.conversation_id,
+                    DBMessage.role,
+                    DBMessage.content,
+                    DBMessage.citations,
+                    DBMessage.created_at
+                )
+                .where(DBMessage.conversation_id.in_([conv.id for conv in conversations]))
+                .order_by(DBMessage.id)
+            )
+            for message in message_result:
+                messages_by_conversation[message.conversation_id].append(message)
+
+        items = [
+            _to_conversation_schema(
+                conv,
+                [_to_message_schema(message) for message in messages_by_conversation[conv.id]]
+            )
+            for conv in conversations
+        ]
+        # 以序列化结果的哈希作为 ETag，列表未变化时返回 304 省去传输
+        return json_etag_response(request, _conversations_adapter.dump_json(items))
+    except Exception as e:
+        logger.exception("Error listing conversations: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/conversations/create", response_model=Conversation)
+async def create_conversation(
+    data: ConversationCreate,
+    service: ConversationService = Depends(get_conversation_service)
+):
+    """创建新对话"""
+    try:
+        conversation = await service.create_conversation(data.name, data.workspace_id)
+        return _to_conversation_schema(conversation)
+    except Exception as e:
+        logger.exception("Error creating conversation: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/conversations/send-message", response_model=Message)
+async def send_message(
+    conversation_id: int,
+    data: MessageCreate,
+    service: ConversationService = Depends(get_conversation_service)
+):
+    """发送消息并获取回复"""
+    try:
+        message = await service.send_message(conversation_id, data.message, data.use_rag)
+        
+        return Message.model_validate(message)
+    except Exception as e:
+        logger.exception("Error sending message: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/conversations/send-message/stream")
+async def send_message_stream(
+    conversation_id: int,
+    data: MessageCreate
+):
+    """发送消息并以 SSE 流式返回回复"""
+    async def event_stream():
+        # 请求依赖的会话在流开始前就已关闭，流内使用独立会话
+        async with AsyncSessionLocal() as session:
+            service = ConversationService(session)
+            try:
+                async for event in service.stream_message(conversation_id, data.message, data.use_rag):
+                    if event["type"] == "message":
+                        event = {
+                            "type": "message",
+                            "message": Message.model_validate(event["message"]).model_dump(mode="json")
+                        }
+                    yield f"data: {json.dumps(event, ensure_ascii=False)}\n\n"
+            except Exception as e:
+                logger.exception("Error streaming message: %s", e)
+                yield f"data: {json.dumps({'type': 'error', 'detail': str(e)}, ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
+
+@router.post("/generate_title", response_model=TitleResponse)
+async def generate_title(
+    data: TitleGenerate,
+    service: ConversationService = Depends(get_conversation_service)
+):
+    """根据对话内容生成标题（小模型生成，相同内容复用缓存结果）"""
+    title = await service.generate_title(data.message, data.ai_response or "")
+    return TitleResponse(title=title)
+
+@router.get("/conversations/messages/{conversation_id}", response_model=List[Message])
+async def get_conversation_messages(
+    conversation_id: int,
+    limit: Optional[int] = Query(None, ge=1, le=200, description="每页数量，不传则返回全部消息"),
+    before_id: Optional[int] = Query(None, ge=1, description="上一页返回的 X-Next-Cursor，返回ID小于该值的消息"),
+    service: ConversationService = Depends(get_conversation_service)
+):
+    """获取对话的消息（按时间正序，分页时从最新消息向前翻页）"""
+    try:
+        messages = await service.get_messages(conversation_id, limit=limit, before_id=before_id)
+        # 满页时通过响应头返回更早一页的游标
+        headers = {}
+        if limit is not None and len(messages) == limit:
+            headers["X-Next-Cursor"] = str(messages[0].id)
+        # 从 ORM 对象直接构建后序列化，跳过字段校验和 response_model 的二次处理
+        body = _messages_adapter.dump_json([_to_message_schema(message) for message in messages])
+        return Response(content=body, media_type="application/json", headers=headers)
+    except Exception as e:
+        logger.exception("Error getting messages: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/conversations/delete")
+async def delete_conversation(
+    conversation_id: int,
+    service: ConversationService = Depends(get_conversation_service)
+):
+    """删除对话"""
+    try:
+        success = await service.delete_conversation(conversation_id)
+        if not success:
+            raise HTTPException(status_code=404, detail="Conversation not found")
+        return {"status": "success"}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Error deleting conversation: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,26 +1,61 @@
+import asyncio
+import json
 import logging
-import os
-import urllib.parse
-from datetime import datetime
-from typing import List
-
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, Query
-from fastapi.responses import StreamingResponse, JSONResponse
-from pydantic import BaseModel
-from sqlalchemy import select, func, and_
-from sqlalchemy.ext.asyncio import AsyncSession
-
-from ..database import get_db
-from ..knowledge.dataset_service import DatasetService
-from ..models.dataset import Dataset as DBDataset
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+import aiofiles
+import aiofiles.os
+from fastapi import APIRouter, BackgroundTasks, Depends, File, HTTPException, Query, Request, Response, UploadFile
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import select, func, update
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from ..database import get_conn, get_db
+from .http_cache import etag_matches, json_etag_response
+from .search import fulltext_search_filter
+from ..knowledge.dataset_service import (
+    DatasetService,
+    FileTooLargeError,
+    REBUILD_BATCH_SIZE,
+    REBUILD_RESUMABLE_STATUSES,
+    claim_rebuild,
+    get_default_dataset_id,
+    get_rebuild_progress
+)
 from ..models.document import Document as DBDocument, DocumentWorkspace
-from ..models.types import Document as DocumentSchema
+from ..models.types import BatchUploadResult, Document as DocumentSchema, DocumentSummary, WorkspaceInfo
 from ..models.workspace import Workspace as DBWorkspace
+from ..services.document_events import TERMINAL_DOCUMENT_STATUSES, document_events
 from ..services.vector_store import vector_store
+from ..utils.file_processor import (
+    MIME_DOCX,
+    MIME_MARKDOWN,
+    MIME_PDF,
+    MIME_TEXT,
+    decode_text,
+    extract_pdf_text,
+    process_docx,
+    validate_file_type
+)
 
 # 配置日志
 logger = logging.getLogger(__name__)
 
+# 批量上传时同时处理的文件数
+UPLOAD_BATCH_CONCURRENCY = 8
+
+# SSE 连接无事件时发送保活注释的间隔（秒）
+SSE_KEEPALIVE_SECONDS = 15
+
+# 单个 SSE 连接的最长时长（秒），超过后服务端结束流
+SSE_MAX_SECONDS = 600
+
+# 文档下载/内容接口的客户端缓存策略（同一文档ID的文件不会变化，新版本是新记录）
+DOCUMENT_CACHE_CONTROL = "private, max-age=3600"
+
 # 定义依赖函数
 async def get_dataset_service(db: AsyncSession = Depends(get_db)) -> DatasetService:
     return DatasetService(db)
@@ -30,139 +65,308 @@ router = APIRouter(
 
 
 
+# 文档列表序列化器（模块级构建一次）
+_documents_adapter = TypeAdapter(List[DocumentSummary])
+
 class ResetResponse(BaseModel):
     status: str
     message: str
 
-def format_size(size_in_bytes: int) -> str:
-    """将字节大小转换为人类可读的格式（KB或MB）"""
-    if size_in_bytes < 1024 * 1024:  # 小于1MB
-        return f"{size_in_bytes / 1024:.1f}KB"
-    else:
-        return f"{size_in_bytes / (1024 * 1024):.1f}MB"
+def _document_etag(file_hash: Optional[str], suffix: str = "") -> Optional[str]:
+    """根据文件哈希生成 ETag，没有哈希时不做条件请求"""
+    if not file_hash:
+        return None
+    return f'"{file_hash}{suffix}"'
+
+def _cache_headers(etag: Optional[str]) -> dict:
+    """条件请求相关的响应头"""
+    if not etag:
+        return {}
+    return {"ETag": etag, "Cache-Control": DOCUMENT_CACHE_CONTROL}
 
-@router.get("/documents/list", response_model=List[DocumentSchema])
+def _to_uploaded_schema(document: DBDocument) -> DocumentSchema:
+    """将刚上传处理完成的文档转换为响应模型"""
+    return DocumentSchema(
+        id=document.id,
+        dataset_id=document.dataset_id,
+        name=document.original_name,  # 使用原始文件名
+        content=document.content if hasattr(document, 'content') else None,
+        mime_type=document.mime_type,
+        status=document.status,
+        size=document.size,
+        version=document.version,  # 添加版本号
+        file_hash=document.file_hash,  # 添加文件哈希
+        error=document.error if hasattr(document, 'error') else None,
+        created_at=document.created_at
+    )
+
+@router.get("/documents/list", response_model=List[DocumentSummary])
 async def list_documents(
-    db: AsyncSession = Depends(get_db),
-    show_all_versions: bool = Query(True, description="是否显示所有版本")
+    request: Request,
+    conn: AsyncConnection = Depends(get_conn),
+    show_all_versions: bool = Query(True, description="是否显示所有版本"),
+    limit: Optional[int] = Query(None, ge=1, le=500, description="每页数量，不传则返回全部"),
+    cursor: Optional[int] = Query(None, ge=1, description="上一页返回的 X-Next-Cursor，返回ID小于该值的文档"),
+    search: Optional[str] = Query(None, max_length=100, description="按文档名称或描述搜索")
 ):
     """获取文档列表"""
     try:
-        # 使用异步会话查询数据库
-        # 构建查询
-        query = select(DBDocument)
+        search_filter = fulltext_search_filter(DBDocument.original_name, DBDocument.description, search.strip()) if search and search.strip() else None
+        
+        # 只查询列表需要的列，避免完整 ORM 对象的加载开销；
+        # 全文 content 可能很大，列表中不返回，通过 /documents/{id}/content 获取
+        query = select(
+            DBDocument.id,
+            DBDocument.dataset_id,
+            DBDocument.original_name,
+            DBDocument.name,
+            DBDocument.mime_type,
+            DBDocument.status,
+            DBDocument.size,
+            DBDocument.version,
+            DBDocument.file_hash,
+            DBDocument.error,
+            DBDocument.created_at
+        )
         
         # 如果不显示所有版本，只显示每个文件的最新版本
         if not show_all_versions:
-            subquery = (
-                select(
-                    DBDocument.file_hash,
-                    DBDocument.original_name,
-                    func.max(DBDocument.version).label('max_version')
-                )
-                .group_by(DBDocument.file_hash, DBDocument.original_name)
-                .subquery()
-            )
-            
-            query = (
-                select(DBDocument)
-                .join(
-                    subquery,
-                    and_(
-                        DBDocument.file_hash == subquery.c.file_hash,
-                        DBDocument.original_name == subquery.c.original_name,
-                        DBDocument.version == subquery.c.max_version
-                    )
-                )
+            # 使用窗口函数按 (file_hash, original_name) 分组取最新版本，单次扫描无需自连接；
+            # 子查询只带出 id 和 rn，列表列按主键从基表取，派生表中不含大字段
+            ranked_query = select(
+                DBDocument.id,
+                func.row_number().over(
+                    partition_by=(DBDocument.file_hash, DBDocument.original_name),
+                    order_by=DBDocument.version.desc()
+                ).label('rn')
             )
+            ranked = ranked_query.subquery()
+            query = query.join(ranked, ranked.c.id == DBDocument.id).where(ranked.c.rn == 1)
+        
+        # 先在全表上排名再过滤：搜索条件作用于外层基表（全文索引只能用于基表列），
+        # 只返回本身就是最新版本且匹配的文档，而不是"匹配的版本中最新的一个"
+        if search_filter is not None:
+            query = query.where(search_filter)
+        
+        # 按ID倒序做游标（keyset）分页，避免 OFFSET 扫描
+        query = query.order_by(DBDocument.id.desc())
+        if cursor is not None:
+            query = query.where(DBDocument.id < cursor)
+        if limit is not None:
+            query = query.limit(limit)
         
         # 执行查询
-        result = await db.execute(query)
-        documents = result.scalars().all()
+        result = await conn.execute(query)
+        documents = result.all()
         
-        # 获取每个文档关联的工作空间
-        document_workspaces = {}
-        for doc in documents:
-            # 查询文档关联的工作空间
-            workspace_result = await db.execute(
-                select(DBWorkspace)
-                .join(DocumentWorkspace, DocumentWorkspace.workspace_id == DBWorkspace.id)
-                .filter(DocumentWorkspace.document_id == doc.id)
+        # 满页时通过响应头返回下一页游标
+        headers = {}
+        if limit is not None and len(documents) == limit:
+            headers["X-Next-Cursor"] = str(documents[-1].id)
+        
+        # 一次性查询所有文档关联的工作空间，避免逐个文档查询（N+1）
+        document_workspaces = defaultdict(list)
+        if documents:
+            workspace_result = await conn.execute(
+                select(
+                    DocumentWorkspace.document_id,
+                    DBWorkspace.id,
+                    DBWorkspace.name,
+                    DBWorkspace.description
+                )
+                .join(DBWorkspace, DocumentWorkspace.workspace_id == DBWorkspace.id)
+                .where(DocumentWorkspace.document_id.in_([doc.id for doc in documents]))
             )
-            workspaces = workspace_result.scalars().all()
-            document_workspaces[doc.id] = [
-                {
-                    "id": ws.id,
-                    "name": ws.name,
-                    "description": ws.description
-                }
-                for ws in workspaces
-            ]
+            for row in workspace_result.all():
+                # 直接从结果行属性构建，无需中间字典
+                document_workspaces[row.document_id].append(WorkspaceInfo.model_validate(row))
         
-        return [
-            DocumentSchema(
+        items = [
+            DocumentSummary(
                 id=doc.id,
                 dataset_id=doc.dataset_id or 1,
                 name=doc.original_name or doc.name or f"未命名文档_{doc.id}",  # 使用原始文件名，如果为空则使用name字段或默认名称
-                content=doc.content,
                 mime_type=doc.mime_type,
                 status=doc.status,
-                size=format_size(doc.size) if doc.size else "0KB",
+                size=doc.size,
                 version=doc.version,  # 添加版本信息
-                file_hash=doc.file_hash[:8] if doc.file_hash else None,  # 添加文件哈希前8位
+                file_hash=doc.file_hash,  # 序列化时输出哈希前8位
                 error=doc.error,
-                created_at=doc.created_at.isoformat() if doc.created_at else None,
+                created_at=doc.created_at,
                 creator = "admin",
                 workspaces=document_workspaces.get(doc.id, [])  # 添加关联的工作空间列表
             )
             for doc in documents
         ]
+        # 以序列化结果的哈希作为 ETag，列表未变化时返回 304 省去传输
+        return json_etag_response(request, _documents_adapter.dump_json(items), headers)
     except Exception as e:
-        logger.error(f"Error listing documents: {str(e)}")
+        logger.exception("Error listing documents: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
+# 启动时需要重新处理的文档状态（进程在解析过程中退出时会停留在这些状态）
+UNFINISHED_DOCUMENT_STATUSES = ("pending", "processing")
+
+# 处于上述状态超过该时长（秒）未更新的文档才视为中断，避免抢占其他进程正在处理的文档
+DOCUMENT_RESUME_STALE_SECONDS = 1800
+
+async def _process_document_in_background(document_id: int, bind):
+    """后台解析文档并生成向量
+
+    请求会话在响应后即关闭，这里基于请求会话的 bind 新建会话（测试中覆盖 get_db 时同样生效）。
+    """
+    async with AsyncSession(bind, expire_on_commit=False) as db:
+        document = await db.get(DBDocument, document_id)
+        if not document:
+            logger.warning(f"Document {document_id} not found for background processing")
+            return
+        try:
+            await DatasetService(db).process_document_content(document)
+        except Exception as e:
+            logger.exception("Error processing document %s: %s", document_id, e)
+            # 回滚会使对象属性过期，直接按ID更新状态
+            await db.rollback()
+            await db.execute(
+                update(DBDocument)
+                .where(DBDocument.id == document_id)
+                .values(status="error", error=str(e))
+            )
+            await db.commit()
+            document_events.publish(document_id, {"status": "error", "error": str(e)})
+
+async def _claim_unfinished_document(db: AsyncSession, document_id: int, cutoff: datetime) -> bool:
+    """用带条件的 UPDATE 占用中断的文档，多个进程同时启动时只有一个能占用成功"""
+    result = await db.execute(
+        update(DBDocument)
+        .where(
+            DBDocument.id == document_id,
+            DBDocument.status.in_(UNFINISHED_DOCUMENT_STATUSES),
+            func.coalesce(DBDocument.updated_at, DBDocument.created_at) < cutoff
+        )
+        .values(status="processing", updated_at=datetime.utcnow())
+    )
+    await db.commit()
+    return result.rowcount == 1
+
+async def resume_unfinished_documents(bind) -> int:
+    """重新处理上次进程退出时仍未处理完成的文档（启动时调用），返回实际占用并处理的文档数
+
+    只处理超过 DOCUMENT_RESUME_STALE_SECONDS 未更新的文档，并逐个原子占用，
+    其他进程正在处理或已被其他进程占用的文档会被跳过。
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=DOCUMENT_RESUME_STALE_SECONDS)
+    async with AsyncSession(bind) as db:
+        result = await db.execute(
+            select(DBDocument.id)
+            .where(
+                DBDocument.status.in_(UNFINISHED_DOCUMENT_STATUSES),
+                func.coalesce(DBDocument.updated_at, DBDocument.created_at) < cutoff
+            )
+            .order_by(DBDocument.id)
+        )
+        claimed_ids = [
+            document_id for document_id in result.scalars().all()
+            if await _claim_unfinished_document(db, document_id, cutoff)
+        ]
+    for document_id in claimed_ids:
+        await _process_document_in_background(document_id, bind)
+    return len(claimed_ids)
+
 @router.post("/documents/upload", response_model=DocumentSchema)
 async def upload_document(
     file: UploadFile,
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
     dataset_service: DatasetService = Depends(get_dataset_service)
 ):
-    """上传文档"""
+    """上传文档（保存后立即返回，解析和向量化在后台进行）"""
     try:
+        # 在写入磁盘前按扩展名拒绝无法解析的文件
+        if not validate_file_type(file.filename):
+            raise HTTPException(status_code=400, detail="Unsupported file type")
+
         # 获取默认数据集
-        result = await db.execute(
-            select(DBDataset).filter(DBDataset.name == "default")
-        )
-        default_dataset = result.scalar_one_or_none()
-        if not default_dataset:
+        default_dataset_id = await get_default_dataset_id(db)
+        if default_dataset_id is None:
             raise HTTPException(status_code=404, detail="Default dataset not found")
 
         # 获取文件类型
         mime_type = file.content_type or dataset_service._get_mime_type(file.filename)
         
-        # 处理文档
-        document = await dataset_service.process_document(
-            file=file.file,
+        # 保存文件并创建文档记录，内容处理交给后台任务
+        document = await dataset_service.create_document(
+            file=file,
             filename=file.filename,
             mime_type=mime_type,
-            dataset_id=default_dataset.id
+            dataset_id=default_dataset_id
         )
+        background_tasks.add_task(_process_document_in_background, document.id, db.bind)
         
-        return DocumentSchema(
-            id=document.id,
-            dataset_id=document.dataset_id,
-            name=document.original_name,  # 使用原始文件名
-            content=document.content if hasattr(document, 'content') else None,
-            mime_type=document.mime_type,
-            status=document.status,
-            size=format_size(document.size) if document.size else "0KB",
-            version=document.version,  # 添加版本号
-            file_hash=document.file_hash[:8] if document.file_hash else None,  # 添加文件哈希
-            error=document.error if hasattr(document, 'error') else None,
-            created_at=document.created_at.isoformat() if document.created_at else None
-        )
+        return _to_uploaded_schema(document)
+    except HTTPException:
+        raise
+    except FileTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
-        logger.error(f"Error uploading document: {str(e)}")
+        logger.exception("Error uploading document: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/documents/upload_batch", response_model=List[BatchUploadResult])
+async def upload_documents_batch(
+    background_tasks: BackgroundTasks,
+    files: List[UploadFile] = File(...),
+    db: AsyncSession = Depends(get_db)
+):
+    """批量上传文档：并发保存文件并创建记录，解析和向量化在后台进行，逐个文件返回结果"""
+    try:
+        # 默认数据集只获取一次
+        default_dataset_id = await get_default_dataset_id(db)
+        if default_dataset_id is None:
+            raise HTTPException(status_code=404, detail="Default dataset not found")
+
+        semaphore = asyncio.Semaphore(UPLOAD_BATCH_CONCURRENCY)
+
+        async def save(file: UploadFile) -> BatchUploadResult:
+            if not validate_file_type(file.filename):
+                return BatchUploadResult(filename=file.filename, error="Unsupported file type")
+            async with semaphore:
+                # 每个文件使用独立会话（AsyncSession 不支持并发使用），与请求会话共用 bind
+                async with AsyncSession(db.bind, expire_on_commit=False) as session:
+                    service = DatasetService(session)
+                    try:
+                        document = await service.create_document(
+                            file=file,
+                            filename=file.filename,
+                            mime_type=file.content_type or service._get_mime_type(file.filename),
+                            dataset_id=default_dataset_id
+                        )
+                    except FileTooLargeError as e:
+                        return BatchUploadResult(filename=file.filename, error=str(e))
+                    except Exception as e:
+                        logger.exception("Error uploading document %s: %s", file.filename, e)
+                        return BatchUploadResult(filename=file.filename, error=str(e))
+            background_tasks.add_task(_process_document_in_background, document.id, db.bind)
+            return BatchUploadResult(filename=file.filename, document=_to_uploaded_schema(document))
+
+        # 版本号按 (file_hash, original_name) 先查后插，同名文件并发保存会得到相同版本号；
+        # 哈希要读完文件才知道，因此按文件名分组，组内顺序保存，不同文件名之间并发
+        files_by_name = defaultdict(list)
+        for index, file in enumerate(files):
+            files_by_name[file.filename].append((index, file))
+
+        results: List[Optional[BatchUploadResult]] = [None] * len(files)
+
+        async def save_group(group) -> None:
+            for index, file in group:
+                results[index] = await save(file)
+
+        # save 内部已处理单个文件的错误，一个文件失败不影响其他文件
+        await asyncio.gather(*(save_group(group) for group in files_by_name.values()))
+        return results
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Error uploading documents: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/documents/delete")
@@ -179,103 +383,150 @@ async def delete_document(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error deleting document: {str(e)}")
+        logger.exception("Error deleting document: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/documents/status/{document_id}")
-async def get_document_status(document_id: int, db: AsyncSession = Depends(get_db)):
+async def get_document_status(
+    document_id: int,
+    dataset_service: DatasetService = Depends(get_dataset_service)
+):
     """获取文档处理状态"""
     try:
-        service = DatasetService(db)
-        status = await service.get_document_status(document_id)
-        # 确保 created_at 是字符串格式
-        if status.get('created_at') and isinstance(status['created_at'], datetime):
-            status['created_at'] = status['created_at'].isoformat()
-        return status
+        # created_at 由 ORJSONResponse 直接序列化为 ISO 格式
+        return await dataset_service.get_document_status(document_id)
     except Exception as e:
-        logger.error(f"Error getting document status: {str(e)}")
+        logger.exception("Error getting document status: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/documents/embeddings/{document_id}")
-async def check_document_embeddings(document_id: int, db: AsyncSession = Depends(get_db)):
+async def check_document_embeddings(
+    document_id: int,
+    dataset_service: DatasetService = Depends(get_dataset_service)
+):
     """检查文档的向量生成情况"""
     try:
-        service = DatasetService(db)
-        status = await service.check_embeddings(document_id)
+        status = await dataset_service.check_embeddings(document_id)
         return status
     except Exception as e:
-        logger.error(f"Error checking embeddings: {str(e)}")
+        logger.exception("Error checking embeddings: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
+async def _read_document_status(bind, document_id: int):
+    """用短生命周期会话读取文档状态，读完立即归还连接"""
+    async with AsyncSession(bind) as session:
+        result = await session.execute(
+            select(DBDocument.status, DBDocument.error).where(DBDocument.id == document_id)
+        )
+        return result.one_or_none()
+
+@router.get("/documents/{document_id}/events")
+async def document_status_events(
+    document_id: int,
+    db: AsyncSession = Depends(get_db)
+):
+    """以 SSE 推送文档处理状态，代替轮询状态接口
+
+    流可能持续很久，不在请求会话上执行查询（避免整个流期间占用连接），
+    只借用它的 bind 按需创建短会话。
+    """
+    bind = db.bind
+    # 先订阅再读取当前状态，避免两者之间的状态变化丢失
+    queue = document_events.subscribe(document_id)
+    try:
+        current = await _read_document_status(bind, document_id)
+    except Exception:
+        document_events.unsubscribe(document_id, queue)
+        raise
+    if current is None:
+        document_events.unsubscribe(document_id, queue)
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    async def event_stream():
+        try:
+            event = {"status": current.status, "error": current.error}
+            yield f"data: {json.dumps(event, ensure_ascii=False)}\n\n"
+            deadline = asyncio.get_running_loop().time() + SSE_MAX_SECONDS
+            while event["status"] not in TERMINAL_DOCUMENT_STATUSES:
+                remaining = deadline - asyncio.get_running_loop().time()
+                if remaining <= 0:
+                    # 超过最长时长后结束，客户端可重新连接
+                    break
+                try:
+                    next_event = await asyncio.wait_for(queue.get(), timeout=min(SSE_KEEPALIVE_SECONDS, remaining))
+                except asyncio.TimeoutError:
+                    # 空闲时重新读取状态，兜底其他进程处理的文档（事件只在本进程内发布）
+                    latest = await _read_document_status(bind, document_id)
+                    if latest is None:
+                        break
+                    if latest.status != event["status"]:
+                        event = {"status": latest.status, "error": latest.error}
+                        yield f"data: {json.dumps(event, ensure_ascii=False)}\n\n"
+                    else:
+                        # 保活注释行，防止代理断开空闲连接
+                        yield ": keepalive\n\n"
+                    continue
+                event = next_event
+                yield f"data: {json.dumps(event, ensure_ascii=False)}\n\n"
+        finally:
+            document_events.unsubscribe(document_id, queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
+
 @router.get("/documents/download/{document_id}")
 async def download_document(
     document_id: int,
+    request: Request,
     db: AsyncSession = Depends(get_db)
 ):
     """下载文档"""
-    file_stream = None
     try:
-        # 获取文档信息
+        # 获取文档信息（只取下载所需的列）
         result = await db.execute(
-            select(DBDocument).filter(DBDocument.id == document_id)
+            select(DBDocument.name, DBDocument.file_path, DBDocument.mime_type, DBDocument.file_hash)
+            .filter(DBDocument.id == document_id)
         )
-        document = result.scalar_one_or_none()
+        document = result.one_or_none()
         
         if not document:
             raise HTTPException(status_code=404, detail="Document not found")
         
-        # 检查文件是否存在
-        if not document.file_path or not os.path.exists(document.file_path):
-            raise HTTPException(status_code=404, detail="File not found")
+        # 客户端缓存的文件与当前一致时直接返回 304，不读文件
+        etag = _document_etag(document.file_hash)
+        if etag_matches(request, etag):
+            return Response(status_code=304, headers=_cache_headers(etag))
         
+        # 检查文件是否存在（异步 stat，结果同时交给 FileResponse 复用）
+        if not document.file_path:
+            raise HTTPException(status_code=404, detail="File not found")
         try:
-            # 打开文件流
-            file_stream = open(document.file_path, "rb")
-            
-            # 设置响应头，使用URL编码处理中文文件名
-            encoded_filename = urllib.parse.quote(document.name)
-            headers = {
-                'Content-Disposition': f'attachment; filename="{encoded_filename}"'
-            }
-            
-            # 定义异步清理函数
-            async def cleanup():
-                if file_stream:
-                    file_stream.close()
-            
-            # 返回文件流
-            return StreamingResponse(
-                file_stream,
-                media_type=document.mime_type,
-                headers=headers,
-                background=cleanup  # 使用异步清理函数
-            )
-        except UnicodeEncodeError as e:
-            # 确保在发生编码错误时关闭文件流
-            if file_stream:
-                file_stream.close()
-            
-            logger.error(f"Encoding error while downloading document: {str(e)}")
-            # 如果遇到编码问题，尝试返回文本内容
-            if document.content:
-                return JSONResponse(
-                    content={"text": document.content},
-                    status_code=200
-                )
-            else:
-                raise HTTPException(status_code=500, detail="无法处理文件编码")
+            stat_result = await aiofiles.os.stat(document.file_path)
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="File not found")
         
+        # FileResponse 使用 sendfile 发送文件，根据 stat 结果设置 Content-Length，
+        # 并自动处理中文文件名的 Content-Disposition
+        return FileResponse(
+            document.file_path,
+            media_type=document.mime_type,
+            filename=document.name,
+            stat_result=stat_result,
+            headers=_cache_headers(etag)
+        )
+    except HTTPException:
+        raise
     except Exception as e:
-        # 确保在发生任何错误时关闭文件流
-        if file_stream:
-            file_stream.close()
-        
-        logger.error(f"Error downloading document: {str(e)}")
+        logger.exception("Error downloading document: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/documents/{document_id}/content")
 async def get_document_content(
     document_id: int,
+    request: Request,
     db: AsyncSession = Depends(get_db)
 ):
     """获取文档内容（纯文本）"""
@@ -289,64 +540,170 @@ async def get_document_content(
         if not document:
             raise HTTPException(status_code=404, detail="Document not found")
         
+        # 文本内容由文件决定，同样以文件哈希作为 ETag（加后缀与下载接口区分）
+        etag = _document_etag(document.file_hash, "-text")
+        if etag_matches(request, etag):
+            return Response(status_code=304, headers=_cache_headers(etag))
+        
         # 如果文档有存储的文本内容，直接返回
         if document.content:
             return JSONResponse(
                 content={"text": document.content},
-                status_code=200
+                status_code=200,
+                headers=_cache_headers(etag)
             )
             
-        # 如果没有存储的文本内容，但有文件路径，尝试读取文件
-        elif document.file_path and os.path.exists(document.file_path):
+        # 如果没有存储的文本内容，但有文件路径，提取文本并保存，后续请求直接返回
+        elif document.file_path and await aiofiles.os.path.exists(document.file_path):
+            # 只有无损提取的文本才写回数据库并允许缓存
+            persist = True
             try:
-                # 对于PDF文件，可以尝试提取文本
-                if document.mime_type == 'application/pdf':
-                    # 这里可以使用PyPDF2或其他PDF解析库提取文本
-                    # 此处仅作为示例，实际实现可能需要添加相应的依赖
-                    return JSONResponse(
-                        content={"text": "PDF文件内容无法直接显示，请下载后查看。"},
-                        status_code=200
-                    )
+                if document.mime_type == MIME_PDF:
+                    # PDF 解析是 CPU 密集操作，放到线程池中执行
+                    content = await asyncio.to_thread(extract_pdf_text, document.file_path)
+                elif document.mime_type == MIME_DOCX:
+                    content, _ = await asyncio.to_thread(process_docx, document.file_path)
+                elif document.mime_type in (MIME_TEXT, MIME_MARKDOWN):
+                    async with aiofiles.open(document.file_path, 'rb') as f:
+                        raw = await f.read()
+                    try:
+                        content = raw.decode('utf-8')
+                    except UnicodeDecodeError:
+                        # 非 UTF-8 文本按检测到的编码尽量解码，结果可能有损，不写回数据库
+                        content = decode_text(raw)
+                        persist = False
                 else:
-                    # 对于其他文件类型，尝试直接读取
-                    with open(document.file_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
                     return JSONResponse(
-                        content={"text": content},
+                        content={"text": "该文件格式不支持文本预览。"},
                         status_code=200
                     )
             except Exception as read_error:
-                logger.error(f"Error reading file content: {str(read_error)}")
+                logger.exception("Error reading file content: %s", read_error)
                 return JSONResponse(
                     content={"text": "无法读取文件内容，可能是不支持的文件格式。"},
                     status_code=200
                 )
+            if not persist:
+                return JSONResponse(content={"text": content}, status_code=200)
+            document.content = content
+            await db.commit()
+            return JSONResponse(
+                content={"text": content},
+                status_code=200,
+                headers=_cache_headers(etag)
+            )
         else:
             return JSONResponse(
                 content={"text": "该文档没有可用的文本内容。"},
                 status_code=200
             )
             
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error getting document content: {str(e)}")
+        logger.exception("Error getting document content: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/documents/{document_id}", response_model=DocumentSchema)
+async def get_document(
+    document_id: int,
+    conn: AsyncConnection = Depends(get_conn)
+):
+    """获取文档详情（含全文内容和关联的工作空间）"""
+    try:
+        result = await conn.execute(
+            select(
+                DBDocument.id,
+                DBDocument.dataset_id,
+                DBDocument.original_name,
+                DBDocument.name,
+                DBDocument.content,
+                DBDocument.mime_type,
+                DBDocument.status,
+                DBDocument.size,
+                DBDocument.version,
+                DBDocument.file_hash,
+                DBDocument.error,
+                DBDocument.created_at
+            ).where(DBDocument.id == document_id)
+        )
+        doc = result.one_or_none()
+        if not doc:
+            raise HTTPException(status_code=404, detail="Document not found")
 
+        workspace_result = await conn.execute(
+            select(DBWorkspace.id, DBWorkspace.name, DBWorkspace.description)
+            .join(DocumentWorkspace, DocumentWorkspace.workspace_id == DBWorkspace.id)
+            .where(DocumentWorkspace.document_id == document_id)
+        )
+
+        return DocumentSchema(
+            id=doc.id,
+            dataset_id=doc.dataset_id or 1,
+            name=doc.original_name or doc.name or f"未命名文档_{doc.id}",
+            content=doc.content,
+            mime_type=doc.mime_type,
+            status=doc.status,
+            size=doc.size,
+            version=doc.version,
+            file_hash=doc.file_hash,
+            error=doc.error,
+            created_at=doc.created_at,
+            workspaces=[WorkspaceInfo.model_validate(row) for row in workspace_result.all()]
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Error getting document: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+
+async def _run_rebuild_vectors(bind, after_id: int, processed: int, batch_size: int):
+    """后台执行向量重建（基于请求会话的 bind 新建会话，请求会话在响应后即关闭）"""
+    async with AsyncSession(bind, expire_on_commit=False) as db:
+        try:
+            await DatasetService(db).rebuild_vectors(after_id=after_id, batch_size=batch_size, processed=processed)
+        except Exception as e:
+            # 失败状态和错误信息已写入重建进度
+            logger.exception("Vector rebuild failed: %s", e)
+
+@router.post("/documents/rebuild-vectors")
+async def rebuild_vectors(
+    background_tasks: BackgroundTasks,
+    after_id: Optional[int] = Query(None, ge=0, description="从该段落ID之后开始重建；不传时从上次中断或失败的位置续跑"),
+    batch_size: int = Query(REBUILD_BATCH_SIZE, ge=1, le=5000, description="每批处理的段落数"),
+    db: AsyncSession = Depends(get_db)
+):
+    """分批重建所有段落的向量"""
+    progress = await get_rebuild_progress(db)
+    if after_id is None and progress["status"] in REBUILD_RESUMABLE_STATUSES:
+        after_id, processed = progress["last_id"], progress["processed"]
+    else:
+        after_id, processed = after_id or 0, 0
+    # 条件 UPDATE 原子占用，避免并发请求同时通过检查后启动两次重建
+    if not await claim_rebuild(db, after_id, processed):
+        raise HTTPException(status_code=409, detail="Vector rebuild is already running")
+    background_tasks.add_task(_run_rebuild_vectors, db.bind, after_id, processed, batch_size)
+    return await get_rebuild_progress(db)
+
+@router.get("/documents/rebuild-vectors/status")
+async def get_rebuild_vectors_status(db: AsyncSession = Depends(get_db)):
+    """获取向量重建进度"""
+    return await get_rebuild_progress(db)
 
 @router.post("/reset", response_model=ResetResponse)
 async def reset_vector_store():
     """重置向量存储，清空所有数据并重新初始化"""
     try:
-        # 调用 vector_store 的重置方法
-        await vector_store.delete_embeddings(
-            ids=vector_store.collection.get()["ids"]
-        )
+        # 调用 vector_store 的重置方法（删除并重建 collection）
+        await vector_store.reset_collection()
         return {
             "status": "success",
             "message": "Vector store has been reset successfully"
         }
     except Exception as e:
-        logger.error(f"Error resetting vector store: {str(e)}")
+        logger.exception("Error resetting vector store: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Failed to reset vector store: {str(e)}"
@@ -0,0 +1,27 @@
+import hashlib
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+
+# 列表类接口：允许客户端缓存，但每次都需用 ETag 重新验证
+LIST_CACHE_CONTROL = "private, no-cache"
+
+
+def etag_matches(request: Request, etag: Optional[str]) -> bool:
+    """判断请求的 If-None-Match 是否命中当前 ETag"""
+    if not etag:
+        return False
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def json_etag_response(request: Request, body: bytes, headers: Optional[Dict[str, str]] = None) -> Response:
+    """返回带内容哈希 ETag 的 JSON 响应，客户端已有相同内容时返回 304"""
+    etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+    response_headers = {**(headers or {}), "ETag": etag, "Cache-Control": LIST_CACHE_CONTROL}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=response_headers)
+    return Response(content=body, media_type="application/json", headers=response_headers)
@@ -1,31 +1,45 @@
+import asyncio
 import logging
 from datetime import datetime
-from typing import List
 
-from fastapi import FastAPI, APIRouter, Depends, HTTPException
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import select
 
-from ai_chat.api.document import router as document_router
-from ai_chat.api.schemas import (
-    Conversation, Message, ConversationCreate,
-    MessageCreate
-)
+import ai_chat.utils.logger  # noqa: F401  配置根日志处理器
+from ai_chat.api.conversation import router as conversation_router
+from ai_chat.api.document import resume_unfinished_documents, router as document_router
 from ai_chat.api.workspace import router as workspace_router
-from ai_chat.chat.conversation_service import ConversationService
-from ai_chat.database import get_db, init_db, SessionLocal
-from ai_chat.knowledge.dataset_service import DatasetService
+from ai_chat.chat.conversation import get_conversation_manager
+from ai_chat.chat.llm_factory import get_llm_service
+from ai_chat.database import AsyncSessionLocal, async_engine, init_db, prewarm_pool
+from ai_chat.knowledge.dataset_service import get_default_dataset_id
 from ai_chat.models.dataset import Dataset as DBDataset
+from ai_chat.models.workspace import Workgroup, Workspace
 from .routes.templates import router as template_router
 
-# 配置日志
-logging.basicConfig(level=logging.INFO)
+# 配置日志（根日志处理器由 utils.logger 统一配置）
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="AI Chat API")
+app = FastAPI(title="AI Chat API", default_response_class=ORJSONResponse)
+
+
+class SelectiveGZipMiddleware(GZipMiddleware):
+    """GZip 压缩，跳过 SSE 流（压缩缓冲会延迟事件推送）和文件下载"""
+
+    excluded_path_suffixes = ("/events", "/stream")
+    excluded_path_prefixes = ("/api/v1/documents/download/",)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            path = scope["path"]
+            if path.endswith(self.excluded_path_suffixes) or path.startswith(self.excluded_path_prefixes):
+                await self.app(scope, receive, send)
+                return
+        await super().__call__(scope, receive, send)
 
-# 创建路由器
-router = APIRouter()
 
 # 配置 CORS
 app.add_middleware(
@@ -34,11 +48,11 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],  # 分页游标、列表 ETag
 )
 
-# 添加 DatasetService 依赖
-async def get_dataset_service(db: AsyncSession = Depends(get_db)) -> DatasetService:
-    return DatasetService(db)
+# 压缩较大的 JSON 响应（对话、消息、文档列表等）
+app.add_middleware(SelectiveGZipMiddleware, minimum_size=1024, compresslevel=5)
 
 @app.on_event("startup")
 async def startup_event():
@@ -48,190 +62,92 @@ async def startup_event():
         await init_db()
         logger.info("Database initialized successfully")
 
-        # 使用同步会话进行初始化
-        db = SessionLocal()
-        try:
+        # 预热连接池
+        await prewarm_pool()
+
+        # 在同一个异步事务中检查并创建默认工作组、工作空间和数据集
+        async with AsyncSessionLocal() as session, session.begin():
+            # 一次查询取回三个默认对象的ID（不存在时为 NULL）
+            result = await session.execute(
+                select(
+                    select(Workgroup.id).where(Workgroup.name == "default").limit(1).scalar_subquery(),
+                    select(Workspace.id).where(Workspace.name == "default").limit(1).scalar_subquery(),
+                    select(DBDataset.id).where(DBDataset.name == "default").limit(1).scalar_subquery()
+                )
+            )
+            workgroup_id, workspace_id, dataset_id = result.one()
+            now = datetime.utcnow()
+
             # 检查并创建默认工作组
-            from ai_chat.models.workspace import Workgroup
-            default_workgroup = db.query(Workgroup).filter(Workgroup.name == "default").first()
-            
-            if not default_workgroup:
+            if workgroup_id is None:
                 default_workgroup = Workgroup(
                     name="default",
                     description="Default workgroup",
-                    created_at=datetime.utcnow()
+                    created_at=now
                 )
-                db.add(default_workgroup)
-                db.commit()
+                session.add(default_workgroup)
+                # 工作空间需要工作组ID
+                await session.flush()
+                workgroup_id = default_workgroup.id
                 logger.info("Created default workgroup")
             else:
                 logger.info("Default workgroup exists")
 
             # 检查并创建默认工作空间
-            from ai_chat.models.workspace import Workspace
-            default_workspace = db.query(Workspace).filter(Workspace.name == "default").first()
-            
-            if not default_workspace:
-                default_workspace = Workspace(
+            if workspace_id is None:
+                session.add(Workspace(
                     name="default",
                     description="Default workspace",
-                    group_id=default_workgroup.id,
-                    created_at=datetime.utcnow(),
-                    updated_at=datetime.utcnow()
-                )
-                db.add(default_workspace)
-                db.commit()
+                    group_id=workgroup_id,
+                    created_at=now,
+                    updated_at=now
+                ))
                 logger.info("Created default workspace")
             else:
                 logger.info("Default workspace exists")
 
             # 检查并创建默认数据集
-            default_dataset = db.query(DBDataset).filter(DBDataset.name == "default").first()
-            
-            if not default_dataset:
-                default_dataset = DBDataset(
+            if dataset_id is None:
+                session.add(DBDataset(
                     name="default",
                     description="Default dataset",
-                    created_at=datetime.utcnow()
-                )
-                db.add(default_dataset)
-                db.commit()
+                    created_at=now
+                ))
                 logger.info("Created default dataset")
             else:
                 logger.info("Default dataset exists")
 
-            logger.info("Application startup complete")
-            
-        except Exception as e:
-            logger.error(f"Error during startup: {e}")
-            db.rollback()
-            raise
-        finally:
-            db.close()
+        # 预热默认数据集ID缓存，上传接口无需再查询
+        async with AsyncSessionLocal() as session:
+            await get_default_dataset_id(session)
+
+        # 预先加载 tiktoken 编码器（首次加载需读取/下载词表，放到线程中执行），
+        # 避免第一条消息承担这部分延迟
+        await asyncio.to_thread(get_conversation_manager)
+
+        # 上次退出时停留在 pending/processing 的文档在后台重新处理（保留任务引用，避免被回收）
+        app.state.resume_documents_task = asyncio.create_task(resume_unfinished_documents(async_engine))
+
+        logger.info("Application startup complete")
             
     except Exception as e:
-        logger.error(f"Error initializing database: {e}")
+        logger.exception("Error initializing database: %s", e)
         raise
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """应用关闭时清理"""
     logger.info("Application shutting down")
+    # 关闭共享的 LLM HTTP 连接池
+    await get_llm_service().aclose()
 
 @app.get("/")
 async def root():
     """API 根路由"""
     return {"status": "ok", "message": "AI Chat API is running"}
 
-@router.get("/conversations/list", response_model=List[Conversation])
-async def list_conversations(db: AsyncSession = Depends(get_db)):
-    """获取所有对话列表"""
-    try:
-        service = ConversationService(db)
-        conversations = await service.get_conversations()
-        return [
-            {
-                "id": conv.id,
-                "name": conv.title,
-                "workspace_id": conv.workspace_id,
-                "created_at": conv.created_at.isoformat() if conv.created_at else None,
-                "messages": []
-            }
-            for conv in conversations
-        ]
-    except Exception as e:
-        logger.error(f"Error listing conversations: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
-
-@router.post("/conversations/create", response_model=Conversation)
-async def create_conversation(
-    data: ConversationCreate,
-    db: AsyncSession = Depends(get_db)
-):
-    """创建新对话"""
-    try:
-        service = ConversationService(db)
-        conversation = await service.create_conversation(data.name, data.workspace_id)
-        return {
-            "id": conversation.id,
-            "name": conversation.title,
-            "workspace_id": conversation.workspace_id,
-            "created_at": conversation.created_at.isoformat() if conversation.created_at else None,
-            "messages": []
-        }
-    except Exception as e:
-        logger.error(f"Error creating conversation: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
-
-@router.post("/conversations/send-message", response_model=Message)
-async def send_message(
-    conversation_id: int,
-    data: MessageCreate,
-    db: AsyncSession = Depends(get_db)
-):
-    """发送消息并获取回复"""
-    try:
-        service = ConversationService(db)
-        message = await service.send_message(conversation_id, data.message, data.use_rag)
-        
-        return {
-            "id": message.id,
-            "conversation_id": message.conversation_id,
-            "role": message.role,
-            "content": message.content,
-            "citations": message.citations if hasattr(message, 'citations') else [],
-            "created_at": message.created_at.isoformat() if message.created_at else None
-        }
-    except Exception as e:
-        logger.error(f"Error sending message: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
-
-@router.get("/conversations/messages/{conversation_id}", response_model=List[Message])
-async def get_conversation_messages(
-    conversation_id: int,
-    db: AsyncSession = Depends(get_db)
-):
-    """获取对话的所有消息"""
-    try:
-        service = ConversationService(db)
-        messages = await service.get_messages(conversation_id)
-        return [
-            {
-                "id": msg.id,
-                "conversation_id": msg.conversation_id,
-                "role": msg.role,
-                "content": msg.content,
-                "citations": msg.citations if msg.citations is not None else [],
-                "created_at": msg.created_at.isoformat() if msg.created_at else None
-            }
-            for msg in messages
-        ]
-    except Exception as e:
-        logger.error(f"Error getting messages: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
-
-@router.post("/conversations/delete")
-async def delete_conversation(
-    conversation_id: int,
-    db: AsyncSession = Depends(get_db)
-):
-    """删除对话"""
-    try:
-        service = ConversationService(db)
-        success = await service.delete_conversation(conversation_id)
-        if not success:
-            raise HTTPException(status_code=404, detail="Conversation not found")
-        return {"status": "success"}
-    except Exception as e:
-        logger.error(f"Error deleting conversation: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-
-
-
 # 注册路由
 app.include_router(workspace_router, prefix="/api/v1", tags=["工作空间管理"])
 app.include_router(document_router, prefix="/api/v1", tags=["文档管理"])
-app.include_router(router, prefix="/api/v1/chat", tags=["对话管理"])
+app.include_router(conversation_router, prefix="/api/v1/chat", tags=["对话管理"])
 app.include_router(template_router) 
\ No newline at end of file
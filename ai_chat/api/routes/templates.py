@@ -1,7 +1,7 @@
 from typing import List
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..schemas import (
     TemplateCreate,
@@ -18,19 +18,21 @@ router = APIRouter(
     tags=["模板管理"]
 )
 
+# 定义依赖函数
+async def get_template_service(db: AsyncSession = Depends(get_db)) -> TemplateService:
+    return TemplateService(db)
+
 @router.post("/create", response_model=TemplateResponse)
 async def create_template(
     template: TemplateCreate,
-    db: Session = Depends(get_db)
+    service: TemplateService = Depends(get_template_service)
 ):
     """创建新模板，使用 LLM 优化内容并提取变量"""
-    service = TemplateService(db)
     return await service.create_template(template)
 
 @router.get("/detail/{template_id}", response_model=TemplateResponse)
-async def get_template(template_id: int, db: Session = Depends(get_db)):
+async def get_template(template_id: int, service: TemplateService = Depends(get_template_service)):
     """获取模板详情"""
-    service = TemplateService(db)
     template = await service.get_template(template_id)
     if not template:
         raise HTTPException(status_code=404, detail="Template not found")
@@ -40,27 +42,25 @@ async def get_template(template_id: int, db: Session = Depends(get_db)):
 async def list_templates(
     skip: int = 0,
     limit: int = 10,
-    db: Session = Depends(get_db)
+    service: TemplateService = Depends(get_template_service)
 ):
     """获取模板列表"""
-    service = TemplateService(db)
     return await service.list_templates(skip, limit)
 
 @router.post("/generate", response_model=TemplateUsageResponse)
 async def use_template(
     template_id: int,
     template_use: TemplateUse,
-    db: Session = Depends(get_db)
+    service: TemplateService = Depends(get_template_service)
 ):
     """使用模板生成内容，并通过 LLM 优化"""
-    service = TemplateService(db)
     return await service.use_template(template_id, template_use)
 
 @router.post("/{template_id}/variables", response_model=TemplateResponse)
 async def update_template_variables(
     template_id: int,
     update: TemplateVariableUpdate,
-    db: Session = Depends(get_db)
+    service: TemplateService = Depends(get_template_service)
 ):
     """更新模板变量，支持添加、删除或更新单个变量
     
@@ -68,7 +68,6 @@ async def update_template_variables(
     - operation: remove - 删除现有变量
     - operation: update - 更新变量名称和描述
     """
-    service = TemplateService(db)
     return await service.update_template_variables(
         template_id, 
         update.operation, 
@@ -5,6 +5,8 @@ from .conversation import (
     ConversationCreate,
     Message,
     MessageCreate,
+    TitleGenerate,
+    TitleResponse,
 )
 from .document import Document
 from .template import (
@@ -17,12 +19,26 @@ from .template import (
     TemplateVariable,
     TemplateVariableUpdate
 )
+from .workspace import (
+    WorkgroupBase,
+    WorkgroupCreate,
+    WorkgroupResponse,
+    WorkgroupUpdateRequest,
+    WorkgroupWithWorkspaces,
+    WorkspaceAssociationRequest,
+    WorkspaceBase,
+    WorkspaceCreate,
+    WorkspaceResponse,
+    WorkspaceUpdateRequest,
+)
 
 __all__ = [
     'Conversation',
     'ConversationCreate',
     'Message',
     'MessageCreate',
+    'TitleGenerate',
+    'TitleResponse',
     'Document',
     'TemplateBase',
     'TemplateCreate',
@@ -32,4 +48,14 @@ __all__ = [
     'TemplateUpdate',
     'TemplateVariable',
     'TemplateVariableUpdate',
+    'WorkgroupBase',
+    'WorkgroupCreate',
+    'WorkgroupResponse',
+    'WorkgroupUpdateRequest',
+    'WorkgroupWithWorkspaces',
+    'WorkspaceAssociationRequest',
+    'WorkspaceBase',
+    'WorkspaceCreate',
+    'WorkspaceResponse',
+    'WorkspaceUpdateRequest',
 ] 
\ No newline at end of file
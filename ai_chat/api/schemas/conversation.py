@@ -1,10 +1,12 @@
 from datetime import datetime
 from typing import List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, field_validator
 
 
 class Message(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     conversation_id: int
     role: str
@@ -12,6 +14,12 @@ class Message(BaseModel):
     citations: List[dict] = []
     created_at: Optional[datetime] = None
 
+    @field_validator('citations', mode='before')
+    @classmethod
+    def _none_citations_to_list(cls, value):
+        # 数据库中 citations 可能为 NULL
+        return [] if value is None else value
+
 class MessageCreate(BaseModel):
     message: str
     use_rag: bool = False
@@ -20,6 +28,13 @@ class ConversationCreate(BaseModel):
     name: Optional[str] = None
     workspace_id: Optional[int] = None
 
+class TitleGenerate(BaseModel):
+    message: str
+    ai_response: Optional[str] = None
+
+class TitleResponse(BaseModel):
+    title: str
+
 class Conversation(BaseModel):
     id: int
     name: str
@@ -1,20 +1,20 @@
 from datetime import datetime
 from typing import Dict, List, Optional, Any
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class TemplateVariable(BaseModel):
-    name: str = Field(...)
-    description: str = Field(...)
-    required: bool = Field(default=True)
+    name: str
+    description: str
+    required: bool = True
 
 class TemplateBase(BaseModel):
-    name: str = Field(...)
-    description: Optional[str] = Field(None)
-    content: str = Field(...)
-    category: Optional[str] = Field(None)
-    author: Optional[str] = Field(None)
+    name: str
+    description: Optional[str] = None
+    content: str
+    category: Optional[str] = None
+    author: Optional[str] = None
 
 class TemplateCreate(BaseModel):
     """创建模板的请求模型"""
@@ -25,19 +25,13 @@ class TemplateCreate(BaseModel):
 
 class TemplateUpdate(BaseModel):
     """更新模板的请求模型"""
-    name: Optional[str] = Field(None)
-    description: Optional[str] = Field(None)
-    content: Optional[str] = Field(None)
-    category: Optional[str] = Field(None)
-    status: Optional[str] = Field(None)
+    name: Optional[str] = None
+    description: Optional[str] = None
+    content: Optional[str] = None
+    category: Optional[str] = None
+    status: Optional[str] = None
     variables: Optional[List[TemplateVariable]] = Field(None, description="要更新的变量列表")
 
-class TemplateVariableOperation(BaseModel):
-    """单个变量的操作模型"""
-    operation: str = Field(..., description="操作类型：add、remove 或 update")
-    variable: TemplateVariable = Field(..., description="要操作的变量")
-    old_name: Optional[str] = Field(None, description="更新操作时的原变量名")
-
 class TemplateVariableUpdate(BaseModel):
     """更新模板变量的请求模型"""
     operation: str = Field(..., description="操作类型：add、remove 或 update")
@@ -45,24 +39,23 @@ class TemplateVariableUpdate(BaseModel):
     old_name: Optional[str] = Field(None, description="更新操作时的原变量名")
 
 class TemplateResponse(TemplateBase):
-    id: int = Field(...)
-    prompt_template: str = Field(...)
-    variables: List[Dict[str, Any]] = Field(...)
-    created_at: datetime = Field(...)
-    updated_at: Optional[datetime] = Field(None)
-    version: int = Field(1)
-    status: str = Field("active")
-    usage_count: int = Field(0)
+    model_config = ConfigDict(from_attributes=True)
 
-    class Config:
-        from_attributes = True
+    id: int
+    prompt_template: str
+    variables: List[Dict[str, Any]]
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    version: int = 1
+    status: str = "active"
+    usage_count: int = 0
 
 class TemplateUse(BaseModel):
-    variable_values: Dict[str, str] = Field(...)
+    variable_values: Dict[str, str]
 
 class TemplateUsageResponse(BaseModel):
-    id: int = Field(...)
-    template_id: int = Field(...)
-    variable_values: Dict[str, str] = Field(...)
-    generated_content: str = Field(...)
-    created_at: datetime = Field(...)
\ No newline at end of file
+    id: int
+    template_id: int
+    variable_values: Dict[str, str]
+    generated_content: str
+    created_at: datetime
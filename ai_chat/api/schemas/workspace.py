@@ -0,0 +1,49 @@
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, ConfigDict
+
+
+class WorkgroupBase(BaseModel):
+    name: str
+    description: Optional[str] = None
+
+class WorkgroupCreate(WorkgroupBase):
+    pass
+
+class WorkgroupResponse(WorkgroupBase):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    created_at: Optional[datetime] = None
+
+class WorkspaceBase(BaseModel):
+    name: str
+    description: Optional[str] = None
+    group_id: int
+
+class WorkspaceCreate(WorkspaceBase):
+    document_ids: Optional[List[int]] = []  # 添加文档ID列表字段
+
+class WorkspaceResponse(WorkspaceBase):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    document_count: int = 0
+
+# 添加新的请求模型
+class WorkspaceAssociationRequest(BaseModel):
+    """工作空间关联请求模型"""
+    document_ids: List[int]  # 修改为文档ID列表
+    workspace_ids: List[int]
+
+class WorkgroupUpdateRequest(WorkgroupCreate):
+    group_id: int
+
+class WorkspaceUpdateRequest(WorkspaceCreate):
+    workspace_id: int
+
+class WorkgroupWithWorkspaces(WorkgroupResponse):
+    workspaces: List[WorkspaceResponse] = []
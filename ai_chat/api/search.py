@@ -0,0 +1,19 @@
+from sqlalchemy import or_
+from sqlalchemy.dialects.mysql import match
+
+
+def fulltext_search_filter(name_column, description_column, term: str):
+    """构建名称/描述的搜索条件
+
+    两个字符及以上使用 ngram 全文索引做短语匹配；单个字符低于 ngram 分词长度，
+    回退到 LIKE 匹配。两列上需要有 ngram FULLTEXT 联合索引。
+    """
+    if len(term) >= 2:
+        # 布尔模式下用双引号做短语匹配，去掉用户输入中的双引号避免破坏语法
+        phrase = '"' + term.replace('"', ' ') + '"'
+        return match(name_column, description_column, against=phrase).in_boolean_mode()
+    pattern = "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    return or_(
+        name_column.like(pattern, escape="\\"),
+        description_column.like(pattern, escape="\\")
+    )
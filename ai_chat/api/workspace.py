@@ -1,13 +1,24 @@
 import logging
-from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from pydantic import TypeAdapter
 from sqlalchemy import func
-from sqlalchemy import select, delete
+from sqlalchemy import select, delete, exists, insert, literal, null, union_all, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from ai_chat.api.search import fulltext_search_filter
+from ai_chat.api.schemas.workspace import (
+    WorkgroupCreate,
+    WorkgroupResponse,
+    WorkgroupUpdateRequest,
+    WorkgroupWithWorkspaces,
+    WorkspaceAssociationRequest,
+    WorkspaceCreate,
+    WorkspaceResponse,
+    WorkspaceUpdateRequest,
+)
 from ai_chat.database import get_db
 from ai_chat.models.document import Document, DocumentWorkspace
 from ai_chat.models.workspace import Workgroup as DBWorkgroup, Workspace as DBWorkspace
@@ -17,73 +28,58 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-# 数据模型
-class WorkgroupBase(BaseModel):
-    name: str
-    description: Optional[str] = None
-
-class WorkgroupCreate(WorkgroupBase):
-    pass
-
-class WorkgroupResponse(WorkgroupBase):
-    id: int
-    created_at: Optional[datetime] = None
-    
-    class Config:
-        from_attributes = True
-        json_encoders = {
-            datetime: lambda v: v.isoformat()
-        }
-
-class WorkspaceBase(BaseModel):
-    name: str
-    description: Optional[str] = None
-    group_id: int
-
-class WorkspaceCreate(WorkspaceBase):
-    document_ids: Optional[List[int]] = []  # 添加文档ID列表字段
-
-class WorkspaceResponse(WorkspaceBase):
-    id: int
-    created_at: Optional[datetime] = None
-    updated_at: Optional[datetime] = None
-    document_count: int = 0
-    
-    class Config:
-        from_attributes = True
-        json_encoders = {
-            datetime: lambda v: v.isoformat()
-        }
-
-# 添加新的请求模型
-class WorkspaceAssociationRequest(BaseModel):
-    """工作空间关联请求模型"""
-    document_ids: List[int]  # 修改为文档ID列表
-    workspace_ids: List[int]
-
-class WorkgroupUpdateRequest(WorkgroupCreate):
-    group_id: int
-
-class WorkspaceUpdateRequest(WorkspaceCreate):
-    workspace_id: int
-
-class WorkgroupWithWorkspaces(WorkgroupResponse):
-    workspaces: List[WorkspaceResponse] = []
+# 列表响应的序列化器，模块加载时构建一次
+_workgroups_adapter = TypeAdapter(List[WorkgroupResponse])
+_workspaces_adapter = TypeAdapter(List[WorkspaceResponse])
+_workgroups_with_workspaces_adapter = TypeAdapter(List[WorkgroupWithWorkspaces])
+
+async def _find_missing_ids(db: AsyncSession, id_column, ids: List[int]) -> List[int]:
+    """用一次 IN 查询检查ID是否存在，返回不存在的ID（升序）"""
+    wanted = set(ids)
+    if not wanted:
+        return []
+    result = await db.execute(select(id_column).where(id_column.in_(wanted)))
+    return sorted(wanted.difference(result.scalars().all()))
+
+def _next_cursor_headers(items: list, limit: Optional[int]) -> Dict[str, str]:
+    """本页已满时通过 X-Next-Cursor 响应头返回下一页游标"""
+    if limit is not None and len(items) == limit:
+        return {"X-Next-Cursor": str(items[-1].id)}
+    return {}
 
 # 工作组接口
 @router.get("/workgroups/list", response_model=List[WorkgroupResponse])
-async def list_workgroups(db: AsyncSession = Depends(get_db)):
-    """获取工作组列表"""
-    result = await db.execute(select(DBWorkgroup))
-    workgroups = result.scalars().all()
-    return [
-        WorkgroupResponse(
+async def list_workgroups(
+    db: AsyncSession = Depends(get_db),
+    limit: Optional[int] = Query(None, ge=1, le=500, description="每页数量，不传则返回全部"),
+    cursor: Optional[int] = Query(None, ge=0, description="上一页返回的 X-Next-Cursor，返回ID大于该值的工作组")
+):
+    """获取工作组列表（按ID升序，支持游标分页）"""
+    # 只查询响应需要的列，不构建 ORM 对象
+    query = (
+        select(DBWorkgroup.id, DBWorkgroup.name, DBWorkgroup.description, DBWorkgroup.created_at)
+        .order_by(DBWorkgroup.id)
+    )
+    # 游标分页：按主键定位，不像 OFFSET 那样需要扫描跳过的行
+    if cursor is not None:
+        query = query.where(DBWorkgroup.id > cursor)
+    if limit is not None:
+        query = query.limit(limit)
+    result = await db.execute(query)
+    # 数据来自数据库且类型已确定，跳过逐字段校验，并直接序列化为 JSON
+    items = [
+        WorkgroupResponse.model_construct(
             id=wg.id,
             name=wg.name,
             description=wg.description or "",
             created_at=wg.created_at
-        ) for wg in workgroups
+        ) for wg in result.all()
     ]
+    return Response(
+        content=_workgroups_adapter.dump_json(items),
+        media_type="application/json",
+        headers=_next_cursor_headers(items, limit)
+    )
 
 @router.post("/workgroups/create", response_model=WorkgroupResponse)
 async def create_workgroup(workgroup: WorkgroupCreate, db: AsyncSession = Depends(get_db)):
@@ -93,70 +89,88 @@ async def create_workgroup(workgroup: WorkgroupCreate, db: AsyncSession = Depend
         description=workgroup.description
     )
     db.add(db_workgroup)
+    # 会话未开启 expire_on_commit，自增ID和 created_at 在 flush 时已写回对象，无需再 refresh
     await db.commit()
-    await db.refresh(db_workgroup)
     return db_workgroup
 
 @router.post("/workgroups/update", response_model=WorkgroupResponse)
 async def update_workgroup(workgroup: WorkgroupUpdateRequest, db: AsyncSession = Depends(get_db)):
     """更新工作组信息"""
+    # 直接执行 UPDATE，按匹配行数判断工作组是否存在，不预先加载整行
     result = await db.execute(
-        select(DBWorkgroup).filter(DBWorkgroup.id == workgroup.group_id)
+        update(DBWorkgroup)
+        .where(DBWorkgroup.id == workgroup.group_id)
+        .values(**workgroup.model_dump(exclude={'group_id'}, exclude_unset=True))
     )
-    db_workgroup = result.scalar_one_or_none()
-    
-    if not db_workgroup:
+    if result.rowcount == 0:
         raise HTTPException(status_code=404, detail="Workgroup not found")
-    
-    for field, value in workgroup.dict(exclude={'group_id'}, exclude_unset=True).items():
-        setattr(db_workgroup, field, value)
-    
+
     await db.commit()
-    await db.refresh(db_workgroup)
-    return db_workgroup
+    return await db.get(DBWorkgroup, workgroup.group_id)
 
 @router.post("/workgroups/delete")
 async def delete_workgroup(group_id: int, db: AsyncSession = Depends(get_db)):
     """删除工作组"""
-    async with db as session:
-        result = await session.execute(
-            delete(DBWorkgroup).where(DBWorkgroup.id == group_id)
-        )
-        await session.commit()
-        
-        if result.rowcount == 0:
-            raise HTTPException(status_code=404, detail="Workgroup not found")
+    result = await db.execute(
+        delete(DBWorkgroup).where(DBWorkgroup.id == group_id)
+    )
+    await db.commit()
+    
+    if result.rowcount == 0:
+        raise HTTPException(status_code=404, detail="Workgroup not found")
     return {"status": "success"}
 
 # 工作空间接口
 @router.get("/workspaces/list", response_model=List[WorkspaceResponse])
-async def list_workspaces(group_id: Optional[int] = None, db: AsyncSession = Depends(get_db)):
-    """获取工作空间列表"""
-    query = select(DBWorkspace)
+async def list_workspaces(
+    group_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db),
+    limit: Optional[int] = Query(None, ge=1, le=500, description="每页数量，不传则返回全部"),
+    cursor: Optional[int] = Query(None, ge=0, description="上一页返回的 X-Next-Cursor，返回ID大于该值的工作空间")
+):
+    """获取工作空间列表（按ID升序，支持游标分页）"""
+    # 一次 LEFT JOIN + GROUP BY 取回所有工作空间及其文档数量，避免逐个 COUNT；
+    # 只查询响应需要的列，不构建 ORM 对象
+    query = (
+        select(
+            DBWorkspace.id,
+            DBWorkspace.name,
+            DBWorkspace.description,
+            DBWorkspace.group_id,
+            DBWorkspace.created_at,
+            DBWorkspace.updated_at,
+            func.count(DocumentWorkspace.document_id).label("document_count")
+        )
+        .outerjoin(DocumentWorkspace, DocumentWorkspace.workspace_id == DBWorkspace.id)
+        .group_by(DBWorkspace.id)
+        .order_by(DBWorkspace.id)
+    )
     if group_id:
         query = query.filter(DBWorkspace.group_id == group_id)
+    if cursor is not None:
+        query = query.where(DBWorkspace.id > cursor)
+    if limit is not None:
+        query = query.limit(limit)
     result = await db.execute(query)
-    workspaces = result.scalars().all()
-    
-    response_workspaces = []
-    for workspace in workspaces:
-        doc_count = await db.execute(
-            select(func.count(DocumentWorkspace.document_id))
-            .filter(DocumentWorkspace.workspace_id == workspace.id)
-        )
-        
-        response_workspace = WorkspaceResponse(
+
+    # 数据来自数据库且类型已确定，跳过逐字段校验，并直接序列化为 JSON
+    items = [
+        WorkspaceResponse.model_construct(
             id=workspace.id,
             name=workspace.name,
             description=workspace.description or "",
             group_id=workspace.group_id,
             created_at=workspace.created_at,
             updated_at=workspace.updated_at or workspace.created_at,
-            document_count=doc_count.scalar() or 0
+            document_count=workspace.document_count or 0
         )
-        response_workspaces.append(response_workspace)
-    
-    return response_workspaces
+        for workspace in result.all()
+    ]
+    return Response(
+        content=_workspaces_adapter.dump_json(items),
+        media_type="application/json",
+        headers=_next_cursor_headers(items, limit)
+    )
 
 @router.post("/workspaces/create", response_model=WorkspaceResponse)
 async def create_workspace(workspace: WorkspaceCreate, db: AsyncSession = Depends(get_db)):
@@ -167,23 +181,20 @@ async def create_workspace(workspace: WorkspaceCreate, db: AsyncSession = Depend
     """
     try:
         # 验证工作组是否存在
-        result = await db.execute(
-            select(DBWorkgroup).filter(DBWorkgroup.id == workspace.group_id)
+        workgroup_exists = await db.scalar(
+            select(exists().where(DBWorkgroup.id == workspace.group_id))
         )
-        if not result.scalar_one_or_none():
+        if not workgroup_exists:
             raise HTTPException(status_code=404, detail="Workgroup not found")
         
-        # 如果提供了文档ID，验证所有文档是否存在
+        # 如果提供了文档ID，一次 IN 查询验证所有文档是否存在
         if workspace.document_ids:
-            for doc_id in workspace.document_ids:
-                doc_result = await db.execute(
-                    select(Document).filter(Document.id == doc_id)
+            missing_documents = await _find_missing_ids(db, Document.id, workspace.document_ids)
+            if missing_documents:
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"Documents not found: {missing_documents}"
                 )
-                if not doc_result.scalar_one_or_none():
-                    raise HTTPException(
-                        status_code=404,
-                        detail=f"Document {doc_id} not found"
-                    )
         
         # 创建工作空间
         db_workspace = DBWorkspace(
@@ -194,24 +205,18 @@ async def create_workspace(workspace: WorkspaceCreate, db: AsyncSession = Depend
         db.add(db_workspace)
         await db.flush()  # 刷新以获取工作空间ID
         
-        # 创建文档关联
-        if workspace.document_ids:
-            for doc_id in workspace.document_ids:
-                doc_workspace = DocumentWorkspace(
-                    document_id=doc_id,
-                    workspace_id=db_workspace.id
-                )
-                db.add(doc_workspace)
+        # 创建文档关联：一次批量插入，重复的文档ID只关联一次，避免违反唯一约束
+        link_rows = [
+            {"document_id": doc_id, "workspace_id": db_workspace.id}
+            for doc_id in dict.fromkeys(workspace.document_ids or [])
+        ]
+        if link_rows:
+            await db.execute(insert(DocumentWorkspace), link_rows)
         
+        # 自增ID和时间戳在 flush 时已写回对象，提交后无需再 refresh
         await db.commit()
-        await db.refresh(db_workspace)
-        
-        # 获取关联的文档数量
-        doc_count = await db.execute(
-            select(func.count(DocumentWorkspace.document_id))
-            .filter(DocumentWorkspace.workspace_id == db_workspace.id)
-        )
         
+        # 新工作空间的文档数量就是刚插入的关联数，无需再 COUNT
         return WorkspaceResponse(
             id=db_workspace.id,
             name=db_workspace.name,
@@ -219,7 +224,7 @@ async def create_workspace(workspace: WorkspaceCreate, db: AsyncSession = Depend
             group_id=db_workspace.group_id,
             created_at=db_workspace.created_at,
             updated_at=db_workspace.updated_at,
-            document_count=doc_count.scalar() or 0
+            document_count=len(link_rows)
         )
         
     except HTTPException:
@@ -227,26 +232,24 @@ async def create_workspace(workspace: WorkspaceCreate, db: AsyncSession = Depend
         raise
     except Exception as e:
         await db.rollback()
-        logger.error(f"Error creating workspace: {str(e)}")
+        logger.exception("Error creating workspace: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/workspaces/update", response_model=WorkspaceResponse)
 async def update_workspace(workspace: WorkspaceUpdateRequest, db: AsyncSession = Depends(get_db)):
     """更新工作空间信息"""
+    # 直接执行 UPDATE，按匹配行数判断工作空间是否存在，不预先加载整行；
+    # document_ids 不是工作空间的列，不参与更新
     result = await db.execute(
-        select(DBWorkspace).filter(DBWorkspace.id == workspace.workspace_id)
+        update(DBWorkspace)
+        .where(DBWorkspace.id == workspace.workspace_id)
+        .values(**workspace.model_dump(exclude={'workspace_id', 'document_ids'}, exclude_unset=True))
     )
-    db_workspace = result.scalar_one_or_none()
-    
-    if not db_workspace:
+    if result.rowcount == 0:
         raise HTTPException(status_code=404, detail="Workspace not found")
-    
-    for field, value in workspace.dict(exclude={'workspace_id'}, exclude_unset=True).items():
-        setattr(db_workspace, field, value)
-    
+
     await db.commit()
-    await db.refresh(db_workspace)
-    return db_workspace
+    return await db.get(DBWorkspace, workspace.workspace_id)
 
 @router.post("/workspaces/delete")
 async def delete_workspace(workspace_id: int, db: AsyncSession = Depends(get_db)):
@@ -261,27 +264,87 @@ async def delete_workspace(workspace_id: int, db: AsyncSession = Depends(get_db)
     return {"status": "success"}
 
 @router.get("/search", response_model=dict)
-async def search(q: str, db: AsyncSession = Depends(get_db)):
-    """搜索工作组和工作空间"""
-    workgroups = await db.execute(
-        select(DBWorkgroup).filter(
-            (DBWorkgroup.name.ilike(f"%{q}%")) |
-            (DBWorkgroup.description.ilike(f"%{q}%"))
-        )
-    )
-    
-    workspaces = await db.execute(
-        select(DBWorkspace).filter(
-            (DBWorkspace.name.ilike(f"%{q}%")) |
-            (DBWorkspace.description.ilike(f"%{q}%"))
-        )
-    )
-    
+async def search(
+    q: str,
+    db: AsyncSession = Depends(get_db),
+    limit: Optional[int] = Query(None, ge=1, le=500, description="每类结果的最大数量，不传则返回全部"),
+    workgroups_after: Optional[int] = Query(None, ge=0, description="上一页返回的 workgroups_next_cursor，返回ID大于该值的工作组"),
+    workspaces_after: Optional[int] = Query(None, ge=0, description="上一页返回的 workspaces_next_cursor，返回ID大于该值的工作空间")
+):
+    """搜索工作组和工作空间
+
+    两类结果各自按ID分页：某类满页时返回对应的 *_next_cursor，下一页通过 *_after 传回。
+    """
+    q = q.strip()
+    if not q:
+        return {"workgroups": [], "workspaces": [], "workgroups_next_cursor": None, "workspaces_next_cursor": None}
+
+    # 两张表的结果用 UNION ALL 合并为一条语句，按 kind 列区分，只需一次往返
+    workgroup_query = select(
+        literal("workgroup").label("kind"),
+        DBWorkgroup.id,
+        DBWorkgroup.name,
+        DBWorkgroup.description,
+        null().label("group_id"),
+        DBWorkgroup.created_at,
+        null().label("updated_at")
+    ).filter(fulltext_search_filter(DBWorkgroup.name, DBWorkgroup.description, q))
+    workspace_query = select(
+        literal("workspace").label("kind"),
+        DBWorkspace.id,
+        DBWorkspace.name,
+        DBWorkspace.description,
+        DBWorkspace.group_id,
+        DBWorkspace.created_at,
+        DBWorkspace.updated_at
+    ).filter(fulltext_search_filter(DBWorkspace.name, DBWorkspace.description, q))
+    if workgroups_after is not None:
+        workgroup_query = workgroup_query.filter(DBWorkgroup.id > workgroups_after)
+    if workspaces_after is not None:
+        workspace_query = workspace_query.filter(DBWorkspace.id > workspaces_after)
+    if limit is not None:
+        workgroup_query = workgroup_query.order_by(DBWorkgroup.id).limit(limit)
+        workspace_query = workspace_query.order_by(DBWorkspace.id).limit(limit)
+    result = await db.execute(union_all(workgroup_query, workspace_query))
+
+    workgroups = []
+    workspaces = []
+    for row in result.all():
+        if row.kind == "workgroup":
+            workgroups.append({
+                "id": row.id,
+                "name": row.name,
+                "description": row.description,
+                "created_at": row.created_at
+            })
+        else:
+            workspaces.append({
+                "id": row.id,
+                "name": row.name,
+                "description": row.description,
+                "group_id": row.group_id,
+                "created_at": row.created_at,
+                "updated_at": row.updated_at
+            })
+
+    # UNION 不保证各部分内部的顺序，游标取本页最大ID
     return {
-        "workgroups": workgroups.scalars().all(),
-        "workspaces": workspaces.scalars().all()
+        "workgroups": workgroups,
+        "workspaces": workspaces,
+        "workgroups_next_cursor": max(item["id"] for item in workgroups) if limit is not None and len(workgroups) == limit else None,
+        "workspaces_next_cursor": max(item["id"] for item in workspaces) if limit is not None and len(workspaces) == limit else None
     }
 
+def _insert_links_ignoring_duplicates(dialect_name: str):
+    """批量插入文档-工作空间关联，已存在的 (document_id, workspace_id) 保持不变
+
+    MySQL 使用 ON DUPLICATE KEY UPDATE（无实际修改），SQLite（测试库）使用 INSERT OR IGNORE。
+    """
+    if dialect_name == "sqlite":
+        return insert(DocumentWorkspace).prefix_with("OR IGNORE")
+    insert_links = mysql_insert(DocumentWorkspace)
+    return insert_links.on_duplicate_key_update(workspace_id=insert_links.inserted.workspace_id)
+
 @router.post("/documents/link-workspaces")
 async def link_document_workspace(
     request: WorkspaceAssociationRequest,
@@ -289,51 +352,66 @@ async def link_document_workspace(
 ):
     """关联多个文档到多个工作空间"""
     try:
-        # 验证所有文档是否存在
-        for document_id in request.document_ids:
-            document = await db.execute(
-                select(Document).filter(Document.id == document_id)
-            )
-            if not document.scalar_one_or_none():
+        # 校验、删除和插入在同一个事务内完成，正常退出时提交，异常时自动回滚
+        async with db.begin():
+            # 批量验证文档和工作空间是否存在（各一次 IN 查询）
+            missing_documents = await _find_missing_ids(db, Document.id, request.document_ids)
+            if missing_documents:
                 raise HTTPException(
-                    status_code=404, 
-                    detail=f"Document {document_id} not found"
+                    status_code=404,
+                    detail=f"Documents not found: {missing_documents}"
                 )
 
-        # 验证所有工作空间是否存在
-        for workspace_id in request.workspace_ids:
-            workspace = await db.execute(
-                select(DBWorkspace).filter(DBWorkspace.id == workspace_id)
-            )
-            if not workspace.scalar_one_or_none():
+            missing_workspaces = await _find_missing_ids(db, DBWorkspace.id, request.workspace_ids)
+            if missing_workspaces:
                 raise HTTPException(
-                    status_code=404, 
-                    detail=f"Workspace {workspace_id} not found"
+                    status_code=404,
+                    detail=f"Workspaces not found: {missing_workspaces}"
                 )
 
-        # 删除旧的关联关系
-        await db.execute(
-            delete(DocumentWorkspace).where(
+            # 现有关联与请求完全一致时无需任何写入
+            requested_links = {
+                (document_id, workspace_id)
+                for document_id in request.document_ids
+                for workspace_id in request.workspace_ids
+            }
+            current_links = await db.execute(
+                select(DocumentWorkspace.document_id, DocumentWorkspace.workspace_id)
+                .where(DocumentWorkspace.document_id.in_(request.document_ids))
+            )
+            if set(current_links.tuples().all()) == requested_links:
+                return {
+                    "status": "success",
+                    "message": "Document workspace links unchanged"
+                }
+
+            # 只删除不再需要的关联，保留的关联不做改动
+            stale_links = delete(DocumentWorkspace).where(
                 DocumentWorkspace.document_id.in_(request.document_ids)
             )
-        )
-
-        # 创建新的关联关系
-        for document_id in request.document_ids:
-            for workspace_id in request.workspace_ids:
-                db_doc_workspace = DocumentWorkspace(
-                    document_id=document_id,
-                    workspace_id=workspace_id
+            if request.workspace_ids:
+                stale_links = stale_links.where(
+                    DocumentWorkspace.workspace_id.notin_(request.workspace_ids)
                 )
-                db.add(db_doc_workspace)
+            await db.execute(stale_links)
+
+            # 一次批量插入新的关联，已存在的 (document_id, workspace_id) 命中唯一约束后保持不变
+            rows = [
+                {"document_id": document_id, "workspace_id": workspace_id}
+                for document_id in dict.fromkeys(request.document_ids)
+                for workspace_id in dict.fromkeys(request.workspace_ids)
+            ]
+            if rows:
+                await db.execute(_insert_links_ignoring_duplicates(db.bind.dialect.name), rows)
 
-        await db.commit()
         return {
             "status": "success",
             "message": f"Successfully linked {len(request.document_ids)} documents to {len(request.workspace_ids)} workspaces"
         }
+    except HTTPException:
+        raise
     except Exception as e:
-        await db.rollback()
+        logger.exception("Error linking documents to workspaces: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/workgroups-with-workspaces", response_model=List[WorkgroupWithWorkspaces])
@@ -344,50 +422,67 @@ async def list_workgroups_with_workspaces(
     try:
         logger.info("Fetching workgroups and workspaces...")
         
-        # 获取所有工作组
-        workgroups_result = await db.execute(
-            select(DBWorkgroup).order_by(DBWorkgroup.created_at.desc())
+        # 一次查询取回工作组、下属工作空间及其文档数量：
+        # 工作组 LEFT JOIN 工作空间 LEFT JOIN 文档关联，按 (工作组, 工作空间) 分组计数
+        result = await db.execute(
+            select(
+                DBWorkgroup.id.label("group_id"),
+                DBWorkgroup.name.label("group_name"),
+                DBWorkgroup.description.label("group_description"),
+                DBWorkgroup.created_at.label("group_created_at"),
+                DBWorkspace.id.label("workspace_id"),
+                DBWorkspace.name.label("workspace_name"),
+                DBWorkspace.description.label("workspace_description"),
+                DBWorkspace.created_at.label("workspace_created_at"),
+                DBWorkspace.updated_at.label("workspace_updated_at"),
+                func.count(DocumentWorkspace.document_id).label("document_count")
+            )
+            .select_from(DBWorkgroup)
+            .outerjoin(DBWorkspace, DBWorkspace.group_id == DBWorkgroup.id)
+            .outerjoin(DocumentWorkspace, DocumentWorkspace.workspace_id == DBWorkspace.id)
+            .group_by(DBWorkgroup.id, DBWorkspace.id)
+            .order_by(
+                DBWorkgroup.created_at.desc(),
+                DBWorkgroup.id,
+                DBWorkspace.created_at.desc()
+            )
         )
-        workgroups = workgroups_result.scalars().all()
-        logger.info(f"Found {len(workgroups)} workgroups")
 
-        # 获取所有工作空间
-        workspaces_result = await db.execute(
-            select(DBWorkspace).order_by(DBWorkspace.created_at.desc())
-        )
-        workspaces = workspaces_result.scalars().all()
-        logger.info(f"Found {len(workspaces)} workspaces")
-
-        # 构建工作组和工作空间的映射关系
-        workspace_map = {}
-        for workspace in workspaces:
-            if workspace.group_id not in workspace_map:
-                workspace_map[workspace.group_id] = []
-            workspace_map[workspace.group_id].append(
-                WorkspaceResponse(
-                    id=workspace.id,
-                    name=workspace.name,
-                    description=workspace.description,
-                    group_id=workspace.group_id,
-                    created_at=workspace.created_at
+        # 按工作组归并结果行（数据来自数据库，跳过逐字段校验）
+        workgroups = {}
+        for row in result.all():
+            workgroup = workgroups.get(row.group_id)
+            if workgroup is None:
+                workgroup = WorkgroupWithWorkspaces.model_construct(
+                    id=row.group_id,
+                    name=row.group_name,
+                    description=row.group_description,
+                    created_at=row.group_created_at,
+                    workspaces=[]
                 )
-            )
-
-        # 构建响应数据
-        response = []
-        for workgroup in workgroups:
-            workgroup_data = WorkgroupWithWorkspaces(
-                id=workgroup.id,
-                name=workgroup.name,
-                description=workgroup.description,
-                created_at=workgroup.created_at,
-                workspaces=workspace_map.get(workgroup.id, [])
-            )
-            response.append(workgroup_data)
+                workgroups[row.group_id] = workgroup
+            # 没有工作空间的工作组，LEFT JOIN 出的工作空间列为 NULL
+            if row.workspace_id is not None:
+                workgroup.workspaces.append(
+                    WorkspaceResponse.model_construct(
+                        id=row.workspace_id,
+                        name=row.workspace_name,
+                        description=row.workspace_description,
+                        group_id=row.group_id,
+                        created_at=row.workspace_created_at,
+                        updated_at=row.workspace_updated_at or row.workspace_created_at,
+                        document_count=row.document_count or 0
+                    )
+                )
+        response = list(workgroups.values())
+        logger.info(f"Found {len(response)} workgroups")
 
         logger.info("Successfully built workgroups with workspaces response")
-        return response
+        return Response(
+            content=_workgroups_with_workspaces_adapter.dump_json(response),
+            media_type="application/json"
+        )
 
     except Exception as e:
-        logger.error(f"Error listing workgroups with workspaces: {str(e)}")
+        logger.exception("Error listing workgroups with workspaces: %s", e)
         raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
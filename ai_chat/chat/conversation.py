@@ -1,10 +1,19 @@
 import logging
+from functools import lru_cache
 from typing import List, Optional, Dict
 
 import tiktoken
 
 logger = logging.getLogger(__name__)
 
+# token 计数缓存容量：历史消息在每轮对话中都会重新计数，缓存后只需编码一次
+TOKEN_COUNT_CACHE_SIZE = 4096
+
+@lru_cache(maxsize=TOKEN_COUNT_CACHE_SIZE)
+def _count_tokens(encoding_name: str, text: str) -> int:
+    """按编码器名称计算文本的 token 数量（结果按文本缓存）"""
+    return len(tiktoken.get_encoding(encoding_name).encode(text))
+
 class ConversationManager:
     def __init__(self, model_name: str = "sf-chat"):
         self.model_name = model_name
@@ -16,9 +25,7 @@ class ConversationManager:
     def get_token_count(self, text: str) -> int:
         """计算文本的token数量"""
         try:
-            tokens = len(self.encoding.encode(text))
-            self.logger.debug(f"Text length: {len(text)} chars, token count: {tokens}")
-            return tokens
+            return _count_tokens(self.encoding.name, text)
         except Exception as e:
             self.logger.warning(f"Error encoding text: {str(e)}, using fallback estimation")
             # 如果编码失败，使用简单的估算
@@ -29,7 +36,7 @@ class ConversationManager:
         if not max_tokens:
             max_tokens = self.max_tokens
             
-        preserved_messages = []
+        kept_count = 0
         current_tokens = 0
         
         # 预留一些token用于系统提示和新的用户消息
@@ -38,19 +45,24 @@ class ConversationManager:
         
         self.logger.info(f"Preparing messages with max_tokens={max_tokens}, effective_max_tokens={effective_max_tokens}")
         
+        # 从最新消息向前累加 token 数，只确定保留的条数；
+        # 保留的消息是连续的尾部，最后一次切片即可，避免逐条 insert(0) 的 O(n²) 开销
         for message in reversed(messages):
             tokens = self.get_token_count(message["content"])
-            if current_tokens + tokens <= effective_max_tokens:
-                preserved_messages.insert(0, message)
-                current_tokens += tokens
-                self.logger.debug(f"Added message with {tokens} tokens, total: {current_tokens}")
-            else:
+            if current_tokens + tokens > effective_max_tokens:
                 self.logger.info(f"Reached token limit ({current_tokens}/{effective_max_tokens}), stopping")
                 break
+            current_tokens += tokens
+            kept_count += 1
                 
-        self.logger.info(f"Final message count: {len(preserved_messages)}, total tokens: {current_tokens}")
-        return preserved_messages
+        self.logger.info(f"Final message count: {kept_count}, total tokens: {current_tokens}")
+        return messages[len(messages) - kept_count:]
 
     def get_messages_for_completion(self, messages: List[Dict], max_tokens: Optional[int] = None) -> List[Dict]:
         """兼容性方法，调用 prepare_messages"""
-        return self.prepare_messages(messages, max_tokens) 
\ No newline at end of file
+        return self.prepare_messages(messages, max_tokens) 
+
+@lru_cache(maxsize=1)
+def get_conversation_manager() -> ConversationManager:
+    """获取共享的 ConversationManager（避免每个请求重新加载 tiktoken 编码器）"""
+    return ConversationManager()
@@ -1,19 +1,26 @@
+import asyncio
+import hashlib
 import json
 import logging
 from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import List, Optional, Dict
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 import re
 
+from sqlalchemy import exists, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy.orm import selectinload
 
-from .conversation import ConversationManager
-from .llm_factory import LLMFactory
+from .conversation import ConversationManager, get_conversation_manager
+from .llm_factory import LLM, get_llm_service
+from ..config import settings
 from ..knowledge.retriever import Retriever
 # SQLAlchemy models
 from ..models.dataset import Conversation as DBConversation, Message
-from ..models.document import DocumentSegment
+from ..models.document import Document as DBDocument, DocumentSegment
+from ..models.workspace import Workspace as DBWorkspace
+from ..utils.cache import LRUCache
 # Pydantic models
 from ..models.types import (
     MessageCreate,
@@ -23,6 +30,37 @@ from ..models.types import (
 
 logger = logging.getLogger(__name__)
 
+# 生成标题时每段输入保留的最大字符数
+TITLE_CONTEXT_CHARS = 200
+
+# 标题不超过20个字，限制回复长度避免模型生成多余内容
+TITLE_MAX_TOKENS = 40
+
+# LLM 回复中引用列表的标记
+CITATIONS_MARKER = "###CITATIONS:"
+
+# 相同输入的标题直接复用，避免重复调用 LLM（进程内共享）
+_title_cache = LRUCache(capacity=1024, ttl=3600)
+
+
+def _to_int_id(value) -> Optional[int]:
+    """引用中的ID可能是整数或字符串，统一转为整数"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+async def batch_fetch_documents(db: AsyncSession, document_ids) -> Dict[int, str]:
+    """一次 IN 查询取回多个文档的名称，返回 {文档ID: 原始文件名}"""
+    ids = {doc_id for doc_id in map(_to_int_id, document_ids) if doc_id is not None}
+    if not ids:
+        return {}
+    result = await db.execute(
+        select(DBDocument.id, DBDocument.original_name).where(DBDocument.id.in_(ids))
+    )
+    return {row.id: row.original_name for row in result.all()}
+
 class RetrievalConfig:
     """检索配置"""
     def __init__(self, 
@@ -34,10 +72,18 @@ class RetrievalConfig:
         self.reranking_enabled = reranking_enabled
 
 class ConversationService:
-    def __init__(self, db: AsyncSession):
+    def __init__(
+        self,
+        db: AsyncSession,
+        llm: Optional[LLM] = None,
+        conversation_manager: Optional[ConversationManager] = None,
+        retriever: Optional[Retriever] = None
+    ):
+        # 只有数据库会话是请求级的，LLM、分词器、向量客户端等默认使用进程内共享实例
         self.db = db
-        self.retriever = Retriever(db)
-        self.llm = None
+        self.retriever = retriever or Retriever(db)
+        self.llm = llm or get_llm_service()
+        self.conversation_manager = conversation_manager or get_conversation_manager()
         self.default_retrieval_config = RetrievalConfig()
         self.logger = logger
     
@@ -50,12 +96,41 @@ class ConversationService:
         finally:
             await session.close()
 
-    async def get_conversations(self) -> List[DBConversation]:
-        """获取所有对话列表"""
+    async def _workspace_exists(self, workspace_id: int) -> bool:
+        """检查工作空间是否存在
+
+        使用独立会话，以便与使用 self.db 的检索并发执行
+        """
+        async with self.session() as session:
+            result = await session.execute(
+                select(exists().where(DBWorkspace.id == workspace_id))
+            )
+            return bool(result.scalar())
+
+    async def get_conversations(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        with_messages: bool = False
+    ) -> List[DBConversation]:
+        """获取对话列表，按最近消息时间倒序
+
+        with_messages 为 True 时用 selectinload 一次 IN 查询加载所有对话的消息，
+        避免逐个对话访问 messages 产生 N+1 查询。
+        """
         try:
-            result = await self.db.execute(
-                select(DBConversation).order_by(DBConversation.created_at.desc())
+            query = (
+                select(DBConversation)
+                .order_by(
+                    DBConversation.last_msg_sent_at.desc(),
+                    DBConversation.created_at.desc()
+                )
+                .offset(skip)
+                .limit(limit)
             )
+            if with_messages:
+                query = query.options(selectinload(DBConversation.messages))
+            result = await self.db.execute(query)
             return result.scalars().all()
         except Exception as e:
             logger.error(f"Failed to get conversations: {str(e)}")
@@ -67,7 +142,7 @@ class ConversationService:
             select(DBConversation).filter(DBConversation.id == conversation_id)
         )
         conversation = result.scalar_one_or_none()
-        return ConversationResponse.from_orm(conversation) if conversation else None
+        return ConversationResponse.model_validate(conversation) if conversation else None
 
     async def create_conversation(self, name: str, workspace_id: int) -> DBConversation:
         """创建新对话"""
@@ -75,18 +150,23 @@ class ConversationService:
         try:
             # 获取AI回复和标题（合并为一次LLM调用）
             logger.info(f"Getting AI response for: {name}")
-            llm = LLMFactory.create_llm()
             
             # 根据 workspace_id 决定是否使用 RAG
             system_prompt = "你是一个有帮助的AI助手。请根据用户的问题提供准确、相关和有帮助的回答。"
             relevant_docs = []
             if workspace_id > 0:
                 # 如果 workspace_id > 0，使用 RAG
-                relevant_docs = await self.retriever.search_with_embedding(
-                    name,
-                    limit=self.default_retrieval_config.top_k,
-                    workspace_id=workspace_id
+                # 工作空间校验与向量检索互不依赖，并发执行以重叠数据库与网络延迟
+                workspace_exists, relevant_docs = await asyncio.gather(
+                    self._workspace_exists(workspace_id),
+                    self.retriever.search_with_embedding(
+                        name,
+                        limit=self.default_retrieval_config.top_k,
+                        workspace_id=workspace_id
+                    )
                 )
+                if not workspace_exists:
+                    raise ValueError(f"Workspace {workspace_id} not found")
                 processed_docs = await self.process_retrieved_documents(relevant_docs, name)
                 system_prompt = self._build_system_prompt(processed_docs)
                 logger.info("Using RAG for conversation creation")
@@ -96,7 +176,7 @@ class ConversationService:
             # 修改系统提示以包含生成标题的请求
             enhanced_system_prompt = system_prompt + "\n\n同时，请在回复的最后一行单独添加一行，格式为：\n###TITLE:简短的对话标题\n这个标题应该不超过20个字，不包含标点符号，概括对话主题。这一行不会显示给用户。"
 
-            ai_response = await llm.chat(
+            ai_response = await self.llm.chat(
                 system=enhanced_system_prompt,
                 history=[],
                 message=name
@@ -119,36 +199,35 @@ class ConversationService:
             citations = await self._extract_used_citations(response_content, relevant_docs) if relevant_docs else []
 
             # 创建对话
+            now = datetime.utcnow()
             conversation = DBConversation(
                 title=title,
                 workspace_id=workspace_id,
-                created_at=datetime.utcnow()
+                created_at=now,
+                last_msg_sent_at=now
             )
-            self.db.add(conversation)
-            await self.db.commit()
-            await self.db.refresh(conversation)
             
-            # 添加用户消息
+            # 添加用户消息（通过关系关联对话，外键由提交时的 flush 按依赖顺序填充）
             user_message = Message(
-                conversation_id=conversation.id,
+                conversation=conversation,
                 content=name,
                 role="user",
                 created_at=datetime.utcnow()
             )
-            self.db.add(user_message)
 
             # 添加AI回复消息
             assistant_message = Message(
-                conversation_id=conversation.id,
+                conversation=conversation,
                 content=response_content,
                 role="assistant",
                 created_at=datetime.utcnow(),
                 citations=citations
             )
-            self.db.add(assistant_message)
+            # 对话和两条消息一次加入会话，在同一次提交中写入，无需先单独 flush 取对话ID
+            self.db.add_all([conversation, user_message, assistant_message])
             
             await self.db.commit()
-            
+
             return conversation
 
         except Exception as e:
@@ -156,14 +235,16 @@ class ConversationService:
             logger.error(f"Error creating conversation: {str(e)}")
             raise Exception(f"创建对话时出错: {str(e)}")
 
-    async def generate_title(self, user_message: str, ai_response: str) -> str:
-        """生成对话标题"""
+    async def generate_title(self, user_message: str, ai_response: str = "") -> str:
+        """生成对话标题（没有AI回复时只根据用户消息生成）"""
         try:
-            # 构建提示词
+            # 构建提示词（只截取开头部分，标题不需要完整上下文，可显著减少输入token）
+            dialogue = f"用户：{user_message[:TITLE_CONTEXT_CHARS]}"
+            if ai_response:
+                dialogue += f"\nAI：{ai_response[:TITLE_CONTEXT_CHARS]}"
             prompt = f"""请根据以下对话生成一个简短、有意义的标题（不超过20个字）：
 
-用户：{user_message}
-AI：{ai_response}
+{dialogue}
 
 要求：
 1. 标题要简洁明了，不超过20个字
@@ -174,12 +255,18 @@ AI：{ai_response}
 
 标题："""
 
-            # 调用AI服务生成标题
-            llm = LLMFactory.create_llm()
-            title = await llm.chat(
+            cache_key = hashlib.blake2b(prompt.encode("utf-8"), digest_size=16).digest()
+            cached_title = _title_cache.get(cache_key)
+            if cached_title is not None:
+                return cached_title
+
+            # 调用AI服务生成标题（使用小模型并限制输出长度）
+            title = await self.llm.chat(
                 system="你是一个标题生成助手。请根据对话内容生成简短、有意义的标题。",
                 history=[],
-                message=prompt
+                message=prompt,
+                model=settings.TITLE_MODEL,
+                max_tokens=TITLE_MAX_TOKENS
             )
             
             # 清理标题
@@ -187,6 +274,7 @@ AI：{ai_response}
             if len(title) > 20:
                 title = title[:20]
             
+            _title_cache.put(cache_key, title)
             return title
         except Exception as e:
             logger.error(f"Error generating title: {str(e)}")
@@ -203,42 +291,80 @@ AI：{ai_response}
         )
         self.db.add(db_message)
         await self.db.commit()
-        await self.db.refresh(db_message)
-        return MessageResponse.from_orm(db_message)
-
-    async def get_messages(self, conversation_id: int) -> List[Message]:
-        """获取对话消息历史"""
+        return MessageResponse.model_validate(db_message)
+
+    async def get_messages(
+        self,
+        conversation_id: int,
+        limit: Optional[int] = None,
+        before_id: Optional[int] = None
+    ) -> List[Message]:
+        """获取对话消息历史（按时间正序）
+
+        传入 limit 时返回 before_id 之前（不传则为最新）的 limit 条消息，
+        按消息ID做游标分页，走 (conversation_id, id) 索引，无需 OFFSET 扫描。
+        """
         try:
-            result = await self.db.execute(
-                select(Message)
-                .filter(Message.conversation_id == conversation_id)
-                .order_by(Message.created_at)
-            )
-            messages = result.scalars().all()
+            query = select(Message).filter(Message.conversation_id == conversation_id)
+            if before_id is not None:
+                query = query.where(Message.id < before_id)
+            if limit is not None:
+                # 先倒序取最近的 limit 条，再翻转为正序
+                result = await self.db.execute(query.order_by(Message.id.desc()).limit(limit))
+                messages = list(reversed(result.scalars().all()))
+            else:
+                result = await self.db.execute(query.order_by(Message.id))
+                messages = result.scalars().all()
 
-            # 处理每条消息的引用信息
+            # 确保 citations 是列表
             for message in messages:
-                if message.citations:
-                    # 确保 citations 是列表
-                    if isinstance(message.citations, str):
-                        message.citations = json.loads(message.citations)
-                    
-                    # 查询每个引用的文档片段位置信息
-                    for citation in message.citations:
-                        if 'segment_id' in citation:
-                            segment_result = await self.db.execute(
-                                select(DocumentSegment)
-                                .filter(DocumentSegment.id == citation['segment_id'])
-                            )
-                            segment = segment_result.scalar_one_or_none()
-                            if segment:
-                                citation.update({
-                                    'page_number': segment.page_number,
-                                    'bbox_x': segment.bbox_x,
-                                    'bbox_y': segment.bbox_y,
-                                    'bbox_width': segment.bbox_width,
-                                    'bbox_height': segment.bbox_height
-                                })
+                if isinstance(message.citations, str):
+                    message.citations = json.loads(message.citations)
+
+            # 一次性查询所有引用的文档片段位置信息，避免逐条引用查询
+            segment_ids = {
+                citation['segment_id']
+                for message in messages if message.citations
+                for citation in message.citations if citation.get('segment_id')
+            }
+            if segment_ids:
+                segment_result = await self.db.execute(
+                    select(
+                        DocumentSegment.id,
+                        DocumentSegment.page_number,
+                        DocumentSegment.bbox_x,
+                        DocumentSegment.bbox_y,
+                        DocumentSegment.bbox_width,
+                        DocumentSegment.bbox_height
+                    ).where(DocumentSegment.id.in_(segment_ids))
+                )
+                # 引用中的 segment_id 可能是整数或字符串，统一按字符串匹配
+                segments = {str(row.id): row for row in segment_result.all()}
+
+                for message in messages:
+                    for citation in message.citations or []:
+                        segment = segments.get(str(citation.get('segment_id')))
+                        if segment:
+                            citation.update({
+                                'page_number': segment.page_number,
+                                'bbox_x': segment.bbox_x,
+                                'bbox_y': segment.bbox_y,
+                                'bbox_width': segment.bbox_width,
+                                'bbox_height': segment.bbox_height
+                            })
+
+            # 同样一次性查询引用涉及的文档名称，避免逐个文档查询
+            document_names = await batch_fetch_documents(self.db, {
+                citation.get('document_id')
+                for message in messages if message.citations
+                for citation in message.citations
+            })
+            if document_names:
+                for message in messages:
+                    for citation in message.citations or []:
+                        document_name = document_names.get(_to_int_id(citation.get('document_id')))
+                        if document_name:
+                            citation['document_name'] = document_name
 
             return messages
         except Exception as e:
@@ -304,6 +430,22 @@ AI：{ai_response}
 
 请开始回答用户的问题。"""
 
+    @staticmethod
+    def _build_citation(doc: Dict, index: int) -> Dict:
+        """根据检索结果构建引用信息"""
+        return {
+            "text": doc.get('content', ''),
+            "document_id": doc.get('document_id', ''),
+            "segment_id": doc.get('segment_id', ''),
+            "similarity": doc.get('similarity', 0),
+            "index": index,
+            "page_number": doc.get('page_number'),
+            "bbox_x": doc.get('bbox_x'),
+            "bbox_y": doc.get('bbox_y'),
+            "bbox_width": doc.get('bbox_width'),
+            "bbox_height": doc.get('bbox_height')
+        }
+
     async def _extract_used_citations(self, response: str, relevant_docs: List[Dict]) -> List[Dict]:
         """从回答中提取实际使用的引用"""
         used_citations = []
@@ -321,20 +463,7 @@ AI：{ai_response}
                 # 获取引用的文档
                 for index in indices:
                     if 1 <= index <= len(relevant_docs):  # 确保引用索引有效
-                        doc = relevant_docs[index-1]
-                        citation = {
-                            "text": doc.get('content', ''),
-                            "document_id": doc.get('document_id', ''),
-                            "segment_id": doc.get('segment_id', ''),
-                            "similarity": doc.get('similarity', 0),
-                            "index": index,
-                            "page_number": doc.get('page_number'),
-                            "bbox_x": doc.get('bbox_x'),
-                            "bbox_y": doc.get('bbox_y'),
-                            "bbox_width": doc.get('bbox_width'),
-                            "bbox_height": doc.get('bbox_height')
-                        }
-                        used_citations.append(citation)
+                        used_citations.append(self._build_citation(relevant_docs[index-1], index))
             except json.JSONDecodeError as e:
                 logger.warning(f"Failed to parse citations array: {e}, citations text: {citations_match.group(1)}")
             except Exception as e:
@@ -350,20 +479,7 @@ AI：{ai_response}
                 # 获取引用的文档
                 for index in indices:
                     if 1 <= index <= len(relevant_docs):  # 确保引用索引有效
-                        doc = relevant_docs[index-1]
-                        citation = {
-                            "text": doc.get('content', ''),
-                            "document_id": doc.get('document_id', ''),
-                            "segment_id": doc.get('segment_id', ''),
-                            "similarity": doc.get('similarity', 0),
-                            "index": index,
-                            "page_number": doc.get('page_number'),
-                            "bbox_x": doc.get('bbox_x'),
-                            "bbox_y": doc.get('bbox_y'),
-                            "bbox_width": doc.get('bbox_width'),
-                            "bbox_height": doc.get('bbox_height')
-                        }
-                        used_citations.append(citation)
+                        used_citations.append(self._build_citation(relevant_docs[index-1], index))
             except json.JSONDecodeError as e:
                 logger.warning(f"Failed to parse citations array: {e}, citations text: {citations_text}")
             except Exception as e:
@@ -374,32 +490,17 @@ AI：{ai_response}
             citation_pattern = r'\[(\d+)\]'
             citation_matches = re.findall(citation_pattern, response)
             
-            # 去重并转换为整数
-            unique_indices = set()
-            for index_str in citation_matches:
-                try:
-                    index = int(index_str)
-                    if 1 <= index <= len(relevant_docs):  # 确保引用索引有效
-                        unique_indices.add(index)
-                except ValueError:
-                    continue
+            # 去重并转换为整数，只保留有效的引用索引
+            unique_indices = {
+                index for index in map(int, citation_matches)
+                if 1 <= index <= len(relevant_docs)
+            }
             
             # 获取引用的文档
-            for index in unique_indices:
-                doc = relevant_docs[index-1]
-                citation = {
-                    "text": doc.get('content', ''),
-                    "document_id": doc.get('document_id', ''),
-                    "segment_id": doc.get('segment_id', ''),
-                    "similarity": doc.get('similarity', 0),
-                    "index": index,
-                    "page_number": doc.get('page_number'),
-                    "bbox_x": doc.get('bbox_x'),
-                    "bbox_y": doc.get('bbox_y'),
-                    "bbox_width": doc.get('bbox_width'),
-                    "bbox_height": doc.get('bbox_height')
-                }
-                used_citations.append(citation)
+            used_citations.extend(
+                self._build_citation(relevant_docs[index-1], index)
+                for index in unique_indices
+            )
         
         # 按照document_id和page_number对引用进行分组合并
         if used_citations:
@@ -457,91 +558,188 @@ AI：{ai_response}
         logger.info(f"Extracted {len(used_citations)} citations from response")
         return used_citations
 
-    async def send_message(self, conversation_id: int, message_content: str, use_rag: bool = True) -> Message:
-        """发送消息并获取回复"""
-        try:
-            # 创建用户消息
+    async def _persist_user_message(self, conversation_id: int, message_content: str) -> int:
+        """写入用户消息并返回消息ID
+
+        使用独立会话，以便与使用 self.db 的检索并发执行
+        """
+        async with self.session() as session:
             user_message = Message(
                 conversation_id=conversation_id,
                 content=message_content,
                 role="user",
                 created_at=datetime.utcnow()
             )
-            self.db.add(user_message)
-            await self.db.commit()
-            await self.db.refresh(user_message)
+            session.add(user_message)
+            # 提交前取ID，该会话提交后属性会过期
+            await session.flush()
+            message_id = user_message.id
+            await session.commit()
+            return message_id
+
+    async def _retrieve_for_conversation(self, conversation_id: int, message_content: str) -> List[Dict]:
+        """从对话所属工作空间检索并处理相关文档"""
+        # 只查询对话的工作空间ID，无需加载整个对话对象
+        result = await self.db.execute(
+            select(DBConversation.workspace_id)
+            .where(DBConversation.id == conversation_id)
+        )
+        workspace_id = result.scalar_one_or_none()
+        
+        logger.info(f"Processing message for conversation {conversation_id} in workspace {workspace_id}")
+
+        if not workspace_id:
+            logger.warning(f"Conversation {conversation_id} has no workspace associated")
+            return []
 
-            # 获取并处理相关文档
+        # 从工作空间关联的文档中检索
+        raw_docs = await self.retriever.search_with_embedding(
+            message_content, 
+            limit=self.default_retrieval_config.top_k,
+            workspace_id=workspace_id
+        )
+        logger.info(f"Retrieved {len(raw_docs)} raw documents from workspace {workspace_id}")
+        for doc in raw_docs:
+            logger.info(f"Document content preview: {doc['content'][:100]}...")
+        
+        relevant_docs = await self.process_retrieved_documents(raw_docs, message_content)
+        logger.info(f"Processed to {len(relevant_docs)} relevant documents")
+        return relevant_docs
+
+    async def _prepare_reply(
+        self,
+        conversation_id: int,
+        message_content: str,
+        use_rag: bool
+    ) -> Tuple[str, List[Tuple[str, str]], List[Dict]]:
+        """写入用户消息并准备调用 LLM 所需的系统提示、历史和检索结果"""
+        # 用户消息的写入与检索（向量化网络请求）互不依赖，并发执行以重叠延迟
+        if use_rag:
+            user_message_id, relevant_docs = await asyncio.gather(
+                self._persist_user_message(conversation_id, message_content),
+                self._retrieve_for_conversation(conversation_id, message_content)
+            )
+        else:
+            user_message_id = await self._persist_user_message(conversation_id, message_content)
             relevant_docs = []
-            if use_rag:
-                # 获取对话实例及其工作空间ID
-                result = await self.db.execute(
-                    select(DBConversation)
-                    .filter(DBConversation.id == conversation_id)
-                )
-                conversation = result.scalar_one_or_none()
-                workspace_id = conversation.workspace_id if conversation else None
-                
-                logger.info(f"Processing message for conversation {conversation_id} in workspace {workspace_id}")
 
-                if workspace_id:
-                    # 从工作空间关联的文档中检索
-                    raw_docs = await self.retriever.search_with_embedding(
-                        message_content, 
-                        limit=self.default_retrieval_config.top_k,
-                        workspace_id=workspace_id
-                    )
-                    logger.info(f"Retrieved {len(raw_docs)} raw documents from workspace {workspace_id}")
-                    for doc in raw_docs:
-                        logger.info(f"Document content preview: {doc['content'][:100]}...")
-                    
-                    relevant_docs = await self.process_retrieved_documents(raw_docs, message_content)
-                    logger.info(f"Processed to {len(relevant_docs)} relevant documents")
-                else:
-                    logger.warning(f"Conversation {conversation_id} has no workspace associated")
+        # 构建系统提示
+        system_prompt = self._build_system_prompt(relevant_docs)
+
+        # 获取对话历史并使用 ConversationManager 处理
+        # 当前用户消息由 llm.chat 单独追加，不计入历史
+        history_result = await self.get_messages(conversation_id)
+        messages = [
+            {"role": msg.role, "content": msg.content}
+            for msg in history_result
+            if msg.id != user_message_id
+        ]
+        preserved_messages = self.conversation_manager.prepare_messages(messages)
+        history = [(msg["role"], msg["content"]) for msg in preserved_messages]
+        
+        logger.info(f"Using {len(history)} messages from history within token limit")
+        return system_prompt, history, relevant_docs
+
+    async def _save_assistant_message(
+        self,
+        conversation_id: int,
+        response: str,
+        relevant_docs: List[Dict]
+    ) -> Message:
+        """清理 LLM 回复、提取引用并保存助手消息"""
+        # 清理响应内容，移除citations标记
+        clean_response = response.split(CITATIONS_MARKER)[0].strip() if CITATIONS_MARKER in response else response
+
+        # 提取实际使用的引用
+        citations = await self._extract_used_citations(response, relevant_docs) if relevant_docs else []
+
+        # 创建助手回复消息
+        assistant_message = Message(
+            conversation_id=conversation_id,
+            content=clean_response,  # 使用清理后的响应
+            role="assistant",
+            created_at=datetime.utcnow(),
+            citations=citations
+        )
+        self.db.add(assistant_message)
+        # 与回复消息同一事务更新对话的最后消息时间，供列表排序
+        await self.db.execute(
+            update(DBConversation)
+            .where(DBConversation.id == conversation_id)
+            .values(last_msg_sent_at=assistant_message.created_at)
+        )
+        await self.db.commit()
 
-            # 构建系统提示
-            system_prompt = self._build_system_prompt(relevant_docs)
+        return assistant_message
 
-            # 获取对话历史并使用 ConversationManager 处理
-            history_result = await self.get_messages(conversation_id)
-            conversation_manager = ConversationManager()
-            messages = [{"role": msg.role, "content": msg.content} for msg in history_result]
-            preserved_messages = conversation_manager.prepare_messages(messages)
-            history = [(msg["role"], msg["content"]) for msg in preserved_messages]
-            
-            logger.info(f"Using {len(history)} messages from history within token limit")
+    async def send_message(self, conversation_id: int, message_content: str, use_rag: bool = True) -> Message:
+        """发送消息并获取回复"""
+        try:
+            system_prompt, history, relevant_docs = await self._prepare_reply(
+                conversation_id, message_content, use_rag
+            )
             
             # 调用 LLM
-            llm = LLMFactory.create_llm()
-            response = await llm.chat(
+            response = await self.llm.chat(
                 system=system_prompt,
                 history=history,
                 message=message_content
             )
 
-            # 清理响应内容，移除citations标记
-            clean_response = response.split("###CITATIONS:")[0].strip() if "###CITATIONS:" in response else response
+            return await self._save_assistant_message(conversation_id, response, relevant_docs)
 
-            # 提取实际使用的引用
-            citations = await self._extract_used_citations(response, relevant_docs) if relevant_docs else []
+        except Exception as e:
+            logger.error(f"Error in send_message: {str(e)}")
+            raise
 
-            # 创建助手回复消息
-            assistant_message = Message(
-                conversation_id=conversation_id,
-                content=clean_response,  # 使用清理后的响应
-                role="assistant",
-                created_at=datetime.utcnow(),
-                citations=citations
+    async def stream_message(
+        self,
+        conversation_id: int,
+        message_content: str,
+        use_rag: bool = True
+    ) -> AsyncIterator[Dict]:
+        """发送消息并以流的形式返回回复
+
+        依次产出 {"type": "delta", "content": ...} 事件，回复完成并保存后
+        产出 {"type": "message", "message": 助手消息}。引用标记及其后的内容不会推送给客户端。
+        """
+        try:
+            system_prompt, history, relevant_docs = await self._prepare_reply(
+                conversation_id, message_content, use_rag
             )
-            self.db.add(assistant_message)
-            await self.db.commit()
-            await self.db.refresh(assistant_message)
 
-            return assistant_message
+            response = ""
+            sent = 0  # 已推送的字符数
+            marker_found = False
+            async for delta in self.llm.chat_stream(
+                system=system_prompt,
+                history=history,
+                message=message_content
+            ):
+                response += delta
+                if marker_found:
+                    continue
+                marker_pos = response.find(CITATIONS_MARKER, max(sent - len(CITATIONS_MARKER), 0))
+                if marker_pos >= 0:
+                    marker_found = True
+                    safe_end = marker_pos
+                else:
+                    # 末尾可能是被拆开的引用标记前缀，暂不推送
+                    safe_end = len(response) - len(CITATIONS_MARKER) + 1
+                if safe_end > sent:
+                    yield {"type": "delta", "content": response[sent:safe_end]}
+                    sent = safe_end
+
+            # 推送剩余内容（去掉引用标记部分）
+            end = response.find(CITATIONS_MARKER) if marker_found else len(response)
+            if end > sent:
+                yield {"type": "delta", "content": response[sent:end]}
+
+            assistant_message = await self._save_assistant_message(conversation_id, response, relevant_docs)
+            yield {"type": "message", "message": assistant_message}
 
         except Exception as e:
-            logger.error(f"Error in send_message: {str(e)}")
+            logger.error(f"Error in stream_message: {str(e)}")
             raise
 
     async def delete_conversation(self, conversation_id: int) -> bool:
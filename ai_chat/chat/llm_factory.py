@@ -1,5 +1,7 @@
+import json
 import logging
-from typing import List, Tuple
+from functools import lru_cache
+from typing import AsyncIterator, List, Optional, Tuple
 
 import httpx
 from tenacity import retry, stop_after_attempt, wait_exponential
@@ -8,6 +10,10 @@ from ..config import settings
 
 logger = logging.getLogger(__name__)
 
+# LLM HTTP 连接池大小
+LLM_MAX_CONNECTIONS = 100
+LLM_MAX_KEEPALIVE_CONNECTIONS = 50
+
 class LLM:
     def __init__(self):
         self.api_key = settings.SF_API_KEY
@@ -19,6 +25,26 @@ class LLM:
         }
         self.timeout = 120.0  # 增加超时时间到120秒
         self.max_retries = 3  # 最大重试次数
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """共享的 HTTP 客户端（连接复用，避免每次请求重新建立 TCP/TLS 连接）"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=LLM_MAX_CONNECTIONS,
+                    max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS
+                ),
+                timeout=self.timeout
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        """关闭共享的 HTTP 客户端"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
     @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
     async def _make_request(self, client: httpx.AsyncClient, **kwargs) -> dict:
@@ -47,12 +73,21 @@ class LLM:
             logger.error(f"Unexpected error: {str(e)}")
             raise
 
-    async def chat(self, system: str, history: List[Tuple[str, str]], message: str) -> str:
+    async def chat(
+        self,
+        system: str,
+        history: List[Tuple[str, str]],
+        message: str,
+        model: Optional[str] = None,
+        max_tokens: int = 2000
+    ) -> str:
         """
         调用 Silicon Flow LLM 进行对话
         :param system: 系统提示
         :param history: 对话历史
         :param message: 当前消息
+        :param model: 本次调用使用的模型，默认使用 CHAT_MODEL
+        :param max_tokens: 回复的最大 token 数
         :return: LLM 回复
         """
         try:
@@ -65,26 +100,73 @@ class LLM:
             # 添加当前消息
             messages.append({"role": "user", "content": message})
 
+            model = model or self.model
             logger.info(f"Sending request to {self.api_base}")
-            logger.info(f"Using model: {self.model}")
+            logger.info(f"Using model: {model}")
             
-            async with httpx.AsyncClient() as client:
-                result = await self._make_request(
-                    client,
-                    json={
-                        "model": self.model,
-                        "messages": messages,
-                        "temperature": 0.7,
-                        "max_tokens": 2000,
-                        "stream": False
-                    }
-                )
-                return result["choices"][0]["message"]["content"]
+            result = await self._make_request(
+                self.client,
+                json={
+                    "model": model,
+                    "messages": messages,
+                    "temperature": 0.7,
+                    "max_tokens": max_tokens,
+                    "stream": False
+                }
+            )
+            return result["choices"][0]["message"]["content"]
 
         except Exception as e:
             logger.error(f"Chat error: {str(e)}")
             raise
 
+    async def chat_stream(self, system: str, history: List[Tuple[str, str]], message: str) -> AsyncIterator[str]:
+        """
+        以流式方式调用 LLM 进行对话，逐段产出回复内容
+        :param system: 系统提示
+        :param history: 对话历史
+        :param message: 当前消息
+        :return: 回复内容片段的异步迭代器
+        """
+        messages = [{"role": "system", "content": system}]
+        for role, content in history:
+            messages.append({"role": role, "content": content})
+        messages.append({"role": "user", "content": message})
+
+        logger.info(f"Sending stream request to {self.api_base}")
+        try:
+            async with self.client.stream(
+                "POST",
+                self.api_base,
+                headers=self.headers,
+                timeout=self.timeout,
+                json={
+                    "model": self.model,
+                    "messages": messages,
+                    "temperature": 0.7,
+                    "max_tokens": 2000,
+                    "stream": True
+                }
+            ) as response:
+                response.raise_for_status()
+                # OpenAI 兼容的 SSE 格式：每行 "data: {...}"，以 "data: [DONE]" 结束
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    chunk = json.loads(data)
+                    if "error" in chunk:
+                        raise Exception(f"API error: {chunk['error']}")
+                    choices = chunk.get("choices") or [{}]
+                    content = (choices[0].get("delta") or {}).get("content")
+                    if content:
+                        yield content
+        except Exception as e:
+            logger.error(f"Chat stream error: {str(e)}")
+            raise
+
     async def chat_completion(self, messages: List[dict]) -> dict:
         """
         调用 Silicon Flow LLM 进行对话补全
@@ -95,18 +177,17 @@ class LLM:
             logger.info(f"Sending request to {self.api_base}")
             logger.info(f"Using model: {self.model}")
             
-            async with httpx.AsyncClient() as client:
-                result = await self._make_request(
-                    client,
-                    json={
-                        "model": self.model,
-                        "messages": messages,
-                        "temperature": 0.7,
-                        "max_tokens": 2000,
-                        "stream": False
-                    }
-                )
-                return result["choices"][0]["message"]
+            result = await self._make_request(
+                self.client,
+                json={
+                    "model": self.model,
+                    "messages": messages,
+                    "temperature": 0.7,
+                    "max_tokens": 2000,
+                    "stream": False
+                }
+            )
+            return result["choices"][0]["message"]
                 
         except Exception as e:
             logger.error(f"Error in chat completion: {str(e)}")
@@ -121,6 +202,7 @@ class LLMFactory:
         """
         return LLM()
 
+@lru_cache(maxsize=1)
 def get_llm_service() -> LLM:
-    """获取 LLM 服务实例"""
+    """获取共享的 LLM 服务实例（无请求状态，进程内复用）"""
     return LLMFactory.create_llm() 
\ No newline at end of file
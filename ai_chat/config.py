@@ -26,6 +26,7 @@ GEEKAI_CHAT_URL = f"{GEEKAI_API_BASE}/chat/completions"
 
 # 模型配置
 CHAT_MODEL = "deepseek-ai/DeepSeek-R1-Distill-Qwen-32B"
+TITLE_MODEL = "Qwen/Qwen2.5-7B-Instruct"  # 生成对话标题用的小模型
 SF_EMBEDDING_MODEL = "Pro/BAAI/bge-m3"  # 轨迹流动的嵌入模型
 GEEKAI_EMBEDDING_MODEL = "gemini-embedding-exp-03-07"  # 极客智坊的嵌入模型
 
@@ -48,6 +49,15 @@ DOCUMENT_PROCESSING = {
     "max_segments_per_page": 10 # 每页最大段落数
 }
 
+# 数据库连接池配置（异步引擎）
+DB_POOL_SIZE = 25
+DB_MAX_OVERFLOW = 25
+DB_POOL_TIMEOUT = 30
+DB_POOL_RECYCLE = 1800
+
+# 上传文件大小上限（字节）
+MAX_UPLOAD_SIZE = 50 * 1024 * 1024
+
 # 向量检索配置
 VECTOR_RETRIEVAL = {
     "similarity_threshold": 0.3,  # 相似度阈值
@@ -63,6 +73,10 @@ class Settings(BaseSettings):
     MYSQL_HOST: str = MYSQL_HOST
     MYSQL_PORT: str = MYSQL_PORT
     MYSQL_DATABASE: str = MYSQL_DATABASE
+    DB_POOL_SIZE: int = DB_POOL_SIZE
+    DB_MAX_OVERFLOW: int = DB_MAX_OVERFLOW
+    DB_POOL_TIMEOUT: int = DB_POOL_TIMEOUT
+    DB_POOL_RECYCLE: int = DB_POOL_RECYCLE
     
     # Chroma配置
     CHROMA_PERSIST_DIRECTORY: str = CHROMA_PERSIST_DIRECTORY
@@ -82,6 +96,7 @@ class Settings(BaseSettings):
     
     # 模型配置
     CHAT_MODEL: str = CHAT_MODEL
+    TITLE_MODEL: str = TITLE_MODEL
     SF_EMBEDDING_MODEL: str = SF_EMBEDDING_MODEL
     GEEKAI_EMBEDDING_MODEL: str = GEEKAI_EMBEDDING_MODEL
     
@@ -101,6 +116,7 @@ class Settings(BaseSettings):
     
     # 文档处理配置
     DOCUMENT_PROCESSING: dict = DOCUMENT_PROCESSING
+    MAX_UPLOAD_SIZE: int = MAX_UPLOAD_SIZE
     
     # 向量检索配置
     VECTOR_RETRIEVAL: dict = VECTOR_RETRIEVAL
@@ -1,11 +1,14 @@
+import asyncio
 import logging
 import os
+from typing import AsyncGenerator
 
 import chromadb
 import pymysql
 from chromadb.config import Settings as ChromaSettings
-from sqlalchemy import create_engine, event
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from fastapi import Depends
+from sqlalchemy import UniqueConstraint, create_engine, event, inspect
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncConnection, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 from .config import settings
@@ -56,9 +59,10 @@ async_engine = create_async_engine(
     settings.DATABASE_URL.replace('mysql+pymysql', 'mysql+aiomysql'),
     echo=False,  # 关闭SQL日志
     pool_pre_ping=True,
-    pool_recycle=3600,
-    pool_size=5,
-    max_overflow=10
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT
 )
 
 # Create sync engine for initialization with connection pool settings
@@ -72,9 +76,7 @@ engine = create_engine(
 )
 
 # Configure session makers
-AsyncSessionLocal = sessionmaker(
-    async_engine, class_=AsyncSession, expire_on_commit=False
-)
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -115,23 +117,82 @@ Base = declarative_base()
 
 
 # Async database dependency
-async def get_db():
-    """获取数据库会话"""
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
+    """获取数据库会话（退出上下文时自动关闭）"""
     async with AsyncSessionLocal() as session:
-        try:
-            yield session
-        finally:
-            await session.close()
+        yield session
+
+
+# 只读连接依赖（Core 查询，无 ORM 身份映射和工作单元开销）
+async def get_conn(session: AsyncSession = Depends(get_db)) -> AsyncGenerator[AsyncConnection, None]:
+    """获取只读数据库连接，用于只读 GET 接口
+
+    连接取自 get_db 的会话，覆盖 get_db（如测试）时同样生效；会话关闭时归还连接。
+    """
+    yield await session.connection()
+
+
+async def prewarm_pool():
+    """预先建立连接池中的常驻连接，避免首批请求承担建连开销"""
+    # 同时持有全部连接后再归还，确保池中建立 DB_POOL_SIZE 个不同的连接
+    results = await asyncio.gather(
+        *(async_engine.connect().start() for _ in range(settings.DB_POOL_SIZE)),
+        return_exceptions=True
+    )
+    connections = [conn for conn in results if not isinstance(conn, BaseException)]
+    errors = [error for error in results if isinstance(error, BaseException)]
+    await asyncio.gather(*(conn.close() for conn in connections))
+    if errors:
+        for error in errors:
+            logger.warning("Database pool prewarm connection failed", exc_info=error)
+        logger.warning(
+            f"Database pool prewarm opened {len(connections)}/{len(results)} connections, "
+            f"{len(errors)} failed"
+        )
+        return
+    logger.info(f"Database pool prewarmed with {settings.DB_POOL_SIZE} connections")
+
+
+# 已有数据库的升级脚本目录（create_all 不会给已存在的表补列或补索引）
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+
+
+def _find_missing_schema(sync_conn) -> list:
+    """对比模型定义与实际库表，返回缺失的列、索引和唯一约束"""
+    inspector = inspect(sync_conn)
+    missing = []
+    for table in Base.metadata.sorted_tables:
+        columns = {column["name"] for column in inspector.get_columns(table.name)}
+        missing.extend(
+            f"{table.name}.{column.name}" for column in table.columns if column.name not in columns
+        )
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        existing.update(constraint["name"] for constraint in inspector.get_unique_constraints(table.name))
+        expected = {index.name for index in table.indexes}
+        expected.update(
+            constraint.name for constraint in table.constraints
+            if isinstance(constraint, UniqueConstraint) and constraint.name
+        )
+        missing.extend(f"{table.name}.{name}" for name in sorted(expected - existing))
+    return missing
 
 
 # 初始化数据库
 async def init_db():
     try:
-        # 首先创建数据库（如果不存在）
-        create_database()
+        # 首先创建数据库（如果不存在），pymysql 为同步调用，放到线程中执行
+        await asyncio.to_thread(create_database)
         
-        # 创建表
-        Base.metadata.create_all(bind=engine)
+        # 创建表（通过异步引擎执行，不阻塞事件循环）
+        async with async_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            missing = await conn.run_sync(_find_missing_schema)
+        if missing:
+            # 旧库缺列/缺索引时直接失败，而不是等到查询时报 Unknown column
+            raise RuntimeError(
+                f"Database schema is out of date, missing: {', '.join(missing)}. "
+                f"Apply the upgrade scripts in {MIGRATIONS_DIR} (see README)."
+            )
         logger.info("Database tables created successfully")
         
         # 初始化 Chroma collection
@@ -145,7 +206,7 @@ async def init_db():
 
 # 删除数据库表
 async def drop_db():
-    async with engine.begin() as conn:
+    async with async_engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
     
     # Delete Chroma collection if exists
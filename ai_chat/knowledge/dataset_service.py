@@ -1,33 +1,132 @@
+import asyncio
 import hashlib
 import json
 import logging
 import os
 import re
-from typing import List, BinaryIO, Any
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
 
+import aiofiles
 import numpy as np
-from sqlalchemy import select, delete, func
+from fastapi import UploadFile
+from sqlalchemy import select, delete, func, insert, or_, true, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..config import DOCUMENT_PROCESSING
+from ..config import DOCUMENT_PROCESSING, settings
 from ..models.dataset import Dataset as DBDataset
-from ..models.document import Document as DBDocument, DocumentSegment as DBDocumentSegment
+from ..models.document import (
+    Document as DBDocument,
+    DocumentSegment as DBDocumentSegment,
+    VectorRebuildState
+)
 from ..models.workspace import Workspace as DBWorkspace
+from ..services.document_events import document_events
 from ..services.vector_store import vector_store
-from ..utils.embeddings import EmbeddingFactory
-from ..utils.file_processor import process_file
+from ..utils.embeddings import get_embedding_factory
+from ..utils.file_processor import MIME_TEXT, get_mime_type, process_file
 
 logger = logging.getLogger(__name__)
 
+# 上传文件分块读写大小
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+class FileTooLargeError(Exception):
+    """上传文件超过 MAX_UPLOAD_SIZE"""
+
+
+# 重建向量时每批处理的段落数
+REBUILD_BATCH_SIZE = 1000
+
+# 向量重建进度行的固定ID
+REBUILD_STATE_ID = 1
+
+# running 状态超过该时长（秒）未更新，视为进程已中断
+REBUILD_STALE_SECONDS = 600
+
+# 可以从 last_id 续跑的状态
+REBUILD_RESUMABLE_STATUSES = ("failed", "interrupted")
+
+
+async def get_rebuild_progress(db: AsyncSession) -> dict:
+    """读取持久化的向量重建进度"""
+    state = await db.get(VectorRebuildState, REBUILD_STATE_ID, populate_existing=True)
+    if state is None:
+        return {"status": "idle", "last_id": 0, "processed": 0, "error": None}
+    status = state.status
+    # 执行重建的进程退出后进度不再更新，不能一直显示为 running
+    if status == "running" and state.updated_at < datetime.utcnow() - timedelta(seconds=REBUILD_STALE_SECONDS):
+        status = "interrupted"
+    return {
+        "status": status,
+        "last_id": state.last_id,
+        "processed": state.processed,
+        "error": state.error
+    }
+
+
+async def save_rebuild_progress(db: AsyncSession, **values) -> dict:
+    """更新并提交向量重建进度（进度行不存在时创建）"""
+    await db.merge(VectorRebuildState(id=REBUILD_STATE_ID, updated_at=datetime.utcnow(), **values))
+    await db.commit()
+    return await get_rebuild_progress(db)
+
+async def claim_rebuild(db: AsyncSession, after_id: int, processed: int) -> bool:
+    """原子地占用向量重建（进度行不是 running，或 running 已超时），成功时返回 True
+
+    用带条件的 UPDATE 判断影响行数，并发请求中只有一个能占用成功。
+    """
+    if await db.get(VectorRebuildState, REBUILD_STATE_ID) is None:
+        # 首次重建时创建进度行，并发创建时主键冲突的一方忽略即可
+        try:
+            db.add(VectorRebuildState(id=REBUILD_STATE_ID, status="idle", last_id=0, processed=0))
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+    now = datetime.utcnow()
+    result = await db.execute(
+        update(VectorRebuildState)
+        .where(
+            VectorRebuildState.id == REBUILD_STATE_ID,
+            or_(
+                VectorRebuildState.status != "running",
+                VectorRebuildState.updated_at < now - timedelta(seconds=REBUILD_STALE_SECONDS)
+            )
+        )
+        .values(status="running", last_id=after_id, processed=processed, error=None, updated_at=now)
+    )
+    await db.commit()
+    return result.rowcount == 1
+
+# 默认数据集ID在进程生命周期内不变，首次查询后缓存
+_default_dataset_id: Optional[int] = None
+_default_dataset_lock = asyncio.Lock()
+
+async def get_default_dataset_id(db: AsyncSession) -> Optional[int]:
+    """获取默认数据集ID（带进程内缓存），不存在时返回 None"""
+    global _default_dataset_id
+    if _default_dataset_id is None:
+        async with _default_dataset_lock:
+            if _default_dataset_id is None:
+                result = await db.execute(
+                    select(DBDataset.id).where(DBDataset.name == "default").limit(1)
+                )
+                _default_dataset_id = result.scalar_one_or_none()
+    return _default_dataset_id
+
 class DatasetService:
+    # 与请求无关的配置和无状态组件放在类级别，避免每个请求重复初始化
+    embedding_factory = get_embedding_factory()
+    logger = logger
+    max_segment_length = DOCUMENT_PROCESSING["max_segment_length"]
+    overlap_length = DOCUMENT_PROCESSING["overlap_length"]
+    min_segment_length = DOCUMENT_PROCESSING["min_segment_length"]
+    max_segments_per_page = DOCUMENT_PROCESSING["max_segments_per_page"]
+
     def __init__(self, db: AsyncSession):
         self.db = db
-        self.embedding_factory = EmbeddingFactory()
-        self.logger = logging.getLogger(__name__)
-        self.max_segment_length = DOCUMENT_PROCESSING["max_segment_length"]
-        self.overlap_length = DOCUMENT_PROCESSING["overlap_length"]
-        self.min_segment_length = DOCUMENT_PROCESSING["min_segment_length"]
-        self.max_segments_per_page = DOCUMENT_PROCESSING["max_segments_per_page"]
         
 
 
@@ -47,21 +146,24 @@ class DatasetService:
             return float(obj)
         return obj
 
-    async def _calculate_file_hash(self, file: BinaryIO) -> str:
-        """计算文件的 SHA256 哈希值"""
+    async def _save_and_hash_file(self, file: UploadFile, target_path: str) -> Tuple[str, int]:
+        """将上传文件异步分块写入磁盘，同时计算 SHA256 哈希值和文件大小（单次读取）
+
+        累计大小超过 MAX_UPLOAD_SIZE 时立即中止，不再继续读写。
+        """
+        max_size = settings.MAX_UPLOAD_SIZE
+        if file.size is not None and file.size > max_size:
+            raise FileTooLargeError(f"文件大小超过上限 {max_size} 字节")
         sha256_hash = hashlib.sha256()
-        # 保存当前文件指针位置
-        current_position = file.tell()
-        # 重置文件指针到开头
-        file.seek(0)
-        
-        # 分块读取文件并更新哈希值
-        for byte_block in iter(lambda: file.read(4096), b""):
-            sha256_hash.update(byte_block)
-            
-        # 恢复文件指针位置
-        file.seek(current_position)
-        return sha256_hash.hexdigest()
+        file_size = 0
+        async with aiofiles.open(target_path, "wb") as f:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                file_size += len(chunk)
+                if file_size > max_size:
+                    raise FileTooLargeError(f"文件大小超过上限 {max_size} 字节")
+                sha256_hash.update(chunk)
+                await f.write(chunk)
+        return sha256_hash.hexdigest(), file_size
 
     async def _get_next_version(self, file_hash: str, original_name: str) -> int:
         """获取文件的下一个版本号"""
@@ -86,42 +188,41 @@ class DatasetService:
 
     async def process_document(
         self,
-        file: Any,
+        file: UploadFile,
+        filename: str,
+        mime_type: str,
+        dataset_id: int
+    ) -> DBDocument:
+        """处理上传的文档（保存文件、创建记录并立即完成解析和向量化）"""
+        document = await self.create_document(file, filename, mime_type, dataset_id)
+        return await self.process_document_content(document)
+
+    async def create_document(
+        self,
+        file: UploadFile,
         filename: str,
         mime_type: str,
         dataset_id: int
     ) -> DBDocument:
-        """处理上传的文档"""
+        """保存上传文件并创建状态为 pending 的文档记录，不做内容解析"""
         try:
             logger.info(f"开始处理文档: {filename}")
             
-            # 获取数据集
-            result = await self.db.execute(select(DBDataset).filter(DBDataset.id == dataset_id))
-            dataset = result.scalar_one_or_none()
-            if not dataset:
-                dataset = DBDataset(name="default", description="Default dataset")
-                self.db.add(dataset)
-                await self.db.commit()
-                logger.info("创建默认数据集")
-
-            # 计算文件哈希值
-            file_hash = await self._calculate_file_hash(file)
-            version = await self._get_next_version(file_hash, filename)
-            unique_filename = await self._get_unique_filename(filename, file_hash, version)
-            file_path = os.path.join("uploads", unique_filename)
-
             # 确保uploads目录存在
             os.makedirs("uploads", exist_ok=True)
 
-            # 保存文件并计算大小
-            file_size = 0
-            with open(file_path, "wb") as f:
-                while chunk := file.read(8192):  # 分块读取，每块8KB
-                    file_size += len(chunk)
-                    f.write(chunk)
-            
-            # 重置文件指针位置
-            file.seek(0)
+            # 先写入临时文件并同时计算哈希和大小，确定版本后再重命名
+            temp_path = os.path.join("uploads", f".upload_{uuid.uuid4().hex}")
+            try:
+                file_hash, file_size = await self._save_and_hash_file(file, temp_path)
+                version = await self._get_next_version(file_hash, filename)
+                unique_filename = await self._get_unique_filename(filename, file_hash, version)
+                file_path = os.path.join("uploads", unique_filename)
+                os.replace(temp_path, file_path)
+            except Exception:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
             logger.info(f"文件大小: {file_size} 字节")
 
             # 创建文档记录
@@ -132,18 +233,31 @@ class DatasetService:
                 size=file_size,  # 使用计算得到的文件大小
                 mime_type=mime_type,
                 version=version,
-                dataset_id=dataset.id,
+                dataset_id=dataset_id,
                 original_name=filename,
-                status="processing"  # 添加状态标记
+                status="pending"  # 等待解析
             )
             self.db.add(document)
             await self.db.commit()
             await self.db.refresh(document)
             logger.info(f"创建文档记录: id={document.id}, size={document.size}")
+            return document
+
+        except Exception as e:
+            logger.error(f"保存文档时出错: {str(e)}")
+            raise
+
+    async def process_document_content(self, document: DBDocument) -> DBDocument:
+        """解析文档内容、切分段落、生成向量并写入向量存储"""
+        try:
+            document.status = "processing"
+            await self.db.commit()
+            document_events.publish(document.id, {"status": "processing", "error": None})
 
-            # 处理文件并获取文本内容和位置信息
+            # 处理文件并获取文本内容和位置信息（PDF/DOCX 解析是 CPU 密集的同步调用，放到线程中执行，
+            # 后台任务与请求共用事件循环，不能阻塞其他请求和 SSE 推送）
             try:
-                content, mime_type, text_blocks = process_file(file_path)
+                content, mime_type, text_blocks = await asyncio.to_thread(process_file, document.file_path)
                 document.status = "processed"  # 更新状态为处理完成
                 document.content = content
                 logger.info(f"文档处理完成: {len(content)} 字符, {len(text_blocks)} 个文本块")
@@ -169,7 +283,8 @@ class DatasetService:
                 page_blocks[page_num].append(block)
             
             # 为每个页面分别处理文本块
-            segment_records = []
+            segment_rows = []
+            segment_metadatas = []
             embeddings_batch = []
             ids_batch = []
             documents_batch = []
@@ -177,7 +292,7 @@ class DatasetService:
             # 如果没有文本块，将整个内容作为一个块处理
             if not page_blocks:
                 logger.info("No text blocks found, processing entire content as one block")
-                if mime_type == 'text/plain':
+                if mime_type == MIME_TEXT:
                     # 对于文本文档，我们使用行号作为定位依据
                     lines = content.split('\n')
                     line_blocks = []
@@ -199,7 +314,7 @@ class DatasetService:
 
             for page_num, blocks in page_blocks.items():
                 # 按位置排序文本块
-                if mime_type == 'text/plain':
+                if mime_type == MIME_TEXT:
                     blocks.sort(key=lambda x: (x.get('line_number', 0), x.get('position', {}).get('x0', 0)))
                 else:
                     blocks.sort(key=lambda x: (x.get('position', {}).get('y0', 0), x.get('position', {}).get('x0', 0)))
@@ -215,19 +330,6 @@ class DatasetService:
                     if not segment.strip():
                         continue
                         
-                    # 生成embedding
-                    embedding = await self.embedding_factory.get_embeddings(segment)
-                    
-                    # 确保 embedding 是一维列表
-                    if isinstance(embedding, np.ndarray):
-                        embedding = embedding.tolist()
-                    elif isinstance(embedding, list) and len(embedding) == 1:
-                        # 如果是嵌套列表，获取内部向量
-                        if isinstance(embedding[0], (list, np.ndarray)):
-                            embedding = embedding[0]
-                            if isinstance(embedding, np.ndarray):
-                                embedding = embedding.tolist()
-                    
                     # 找到段落对应的文本块
                     matching_blocks = []
                     for block in blocks:
@@ -235,7 +337,7 @@ class DatasetService:
                             matching_blocks.append(block)
                     
                     # 根据文档类型处理定位信息
-                    if mime_type == 'text/plain':
+                    if mime_type == MIME_TEXT:
                         # 文本文档使用行号定位
                         if matching_blocks:
                             block_info = {
@@ -315,55 +417,69 @@ class DatasetService:
                             has_dates = True
                     
                     # 生成唯一的 chroma_id
-                    chroma_id = f"doc_{document.id}_seg_{len(segment_records)}"
-                    
-                    # 创建文档片段记录
-                    segment_record = DBDocumentSegment(
-                        document_id=document.id,
-                        content=segment,
-                        position=len(segment_records),
-                        word_count=len(segment.split()),
-                        tokens=len(segment),
-                        page_number=block_info['page_number'],
-                        bbox_x=block_info.get('bbox_x', 0),
-                        bbox_y=block_info.get('bbox_y', block_info.get('line_number', 0)),
-                        bbox_width=block_info.get('bbox_width', 0),
-                        bbox_height=block_info.get('bbox_height', block_info.get('line_count', 0)),
-                        chroma_id=chroma_id,
-                        metadata=json.dumps({
-                            'is_table': is_table,
-                            'is_key_value': is_key_value,
-                            'row_y': float(row_y) if row_y is not None else None,
-                            'has_numbers': has_numbers,
-                            'has_dates': has_dates,
-                            'table_data': table_data if table_data else None,
-                            'content_type': 'key_value' if is_key_value else ('table' if is_table else 'text')
-                        }) if matching_blocks else None
-                    )
+                    chroma_id = f"doc_{document.id}_seg_{len(segment_rows)}"
                     
-                    segment_records.append(segment_record)
-                    embeddings_batch.append(embedding)
+                    # 创建文档片段记录（批量插入用的行数据）
+                    segment_rows.append({
+                        'document_id': document.id,
+                        'content': segment,
+                        'position': len(segment_rows),
+                        'word_count': len(segment.split()),
+                        'tokens': len(segment),
+                        'page_number': block_info['page_number'],
+                        'bbox_x': block_info.get('bbox_x', 0),
+                        'bbox_y': block_info.get('bbox_y', block_info.get('line_number', 0)),
+                        'bbox_width': block_info.get('bbox_width', 0),
+                        'bbox_height': block_info.get('bbox_height', block_info.get('line_count', 0)),
+                        'chroma_id': chroma_id
+                    })
+                    # 段落元数据只写入向量存储，不落库
+                    segment_metadatas.append(json.dumps({
+                        'is_table': is_table,
+                        'is_key_value': is_key_value,
+                        'row_y': float(row_y) if row_y is not None else None,
+                        'has_numbers': has_numbers,
+                        'has_dates': has_dates,
+                        'table_data': table_data if table_data else None,
+                        'content_type': 'key_value' if is_key_value else ('table' if is_table else 'text')
+                    }) if matching_blocks else None)
                     ids_batch.append(chroma_id)
                     documents_batch.append(segment)
 
-            # 批量保存文档片段
-            self.db.add_all(segment_records)
-            await self.db.commit()
+            # 所有段落一次性批量生成embedding（内部按批并发请求）
+            if documents_batch:
+                embeddings_batch = [
+                    embedding.tolist() if isinstance(embedding, np.ndarray) else embedding
+                    for embedding in await self.embedding_factory.get_embeddings(documents_batch)
+                ]
+
+            # 批量写入文档片段：一条 executemany 语句写入，而不是逐行 INSERT 取回自增ID
+            # 段落在向量写入成功后才提交，向量写入失败时随事务回滚，不会留下没有向量的段落
+            segment_ids = {}
+            if segment_rows:
+                await self.db.execute(insert(DBDocumentSegment), segment_rows)
+                # MySQL 不支持 RETURNING，按 chroma_id 一次性回读自增ID
+                id_result = await self.db.execute(
+                    select(DBDocumentSegment.chroma_id, DBDocumentSegment.id)
+                    .where(DBDocumentSegment.document_id == document.id)
+                )
+                segment_ids = dict(id_result.all())
 
             # 准备元数据
             metadatas_batch = []
-            for segment_record in segment_records:
+            for row, segment_metadata in zip(segment_rows, segment_metadatas):
+                segment_id = segment_ids.get(row['chroma_id'])
                 metadata = {
                     "document_id": str(document.id),
-                    "segment_id": str(segment_record.id),
-                    "page_number": segment_record.page_number
+                    "segment_id": str(segment_id),
+                    "page_number": row['page_number']
                 }
                 
-                if segment_record.metadata:
+                if segment_metadata:
                     try:
-                        metadata.update(json.loads(segment_record.metadata))
+                        metadata.update(json.loads(segment_metadata))
                     except json.JSONDecodeError:
-                        logger.error(f"Failed to parse metadata for segment {segment_record.id}")
+                        logger.error(f"Failed to parse metadata for segment {segment_id}")
                 
                 # 确保所有元数据值都是基本类型
                 for key, value in metadata.items():
@@ -385,8 +501,20 @@ class DatasetService:
                 logger.info(f"成功添加 {len(ids_batch)} 个向量到向量存储")
             except Exception as e:
                 logger.error(f"添加向量到向量存储时出错: {str(e)}")
+                # 回滚未提交的段落和内容，文档标记为失败（回滚会使对象属性过期，先取出ID）
+                document_id = document.id
+                await self.db.rollback()
+                await self.db.execute(
+                    update(DBDocument)
+                    .where(DBDocument.id == document_id)
+                    .values(status="error", error=str(e))
+                )
+                await self.db.commit()
+                document_events.publish(document_id, {"status": "error", "error": str(e)})
                 raise
 
+            await self.db.commit()
+            document_events.publish(document.id, {"status": document.status, "error": None})
             return document
 
         except Exception as e:
@@ -458,31 +586,102 @@ class DatasetService:
 
     def _get_mime_type(self, filename: str) -> str:
         """获取文件的MIME类型"""
-        if filename.endswith('.txt'):
-            return 'text/plain'
-        elif filename.endswith('.pdf'):
-            return 'application/pdf'
-        else:
-            return 'application/octet-stream'
+        return get_mime_type(filename)
+
+    async def rebuild_vectors(
+        self,
+        after_id: int = 0,
+        batch_size: int = REBUILD_BATCH_SIZE,
+        processed: int = 0
+    ) -> dict:
+        """按段落ID分批重建向量存储
+
+        以 id 作为游标分批读取段落，每批生成embedding后 upsert 到向量存储，
+        不需要预先清空集合。每批完成后将进度写入 vector_rebuild_state，中断后可从 last_id 继续。
+        """
+        await save_rebuild_progress(self.db, status="running", last_id=after_id, processed=processed, error=None)
+        cursor = after_id
+        try:
+            while True:
+                result = await self.db.execute(
+                    select(
+                        DBDocumentSegment.id,
+                        DBDocumentSegment.document_id,
+                        DBDocumentSegment.content,
+                        DBDocumentSegment.chroma_id,
+                        DBDocumentSegment.page_number
+                    )
+                    .where(
+                        DBDocumentSegment.id > cursor,
+                        DBDocumentSegment.chroma_id.isnot(None)
+                    )
+                    .order_by(DBDocumentSegment.id)
+                    .limit(batch_size)
+                )
+                rows = result.all()
+                if not rows:
+                    break
+
+                embeddings = await self.embedding_factory.get_embeddings([row.content for row in rows])
+                # 表格/键值对等段落元数据只保存在向量存储中，upsert 会整体替换元数据，
+                # 因此先取出已有元数据再合并，避免重建后丢失
+                existing_metadatas = await vector_store.get_metadatas([row.chroma_id for row in rows])
+                await vector_store.upsert_embeddings(
+                    ids=[row.chroma_id for row in rows],
+                    embeddings=[
+                        embedding.tolist() if isinstance(embedding, np.ndarray) else embedding
+                        for embedding in embeddings
+                    ],
+                    documents=[row.content for row in rows],
+                    metadatas=[
+                        {
+                            **existing_metadatas.get(row.chroma_id, {}),
+                            "document_id": str(row.document_id),
+                            "segment_id": str(row.id),
+                            "page_number": row.page_number if row.page_number is not None else ""
+                        }
+                        for row in rows
+                    ]
+                )
+
+                cursor = rows[-1].id
+                processed += len(rows)
+                await save_rebuild_progress(self.db, last_id=cursor, processed=processed)
+                logger.info(f"向量重建进度: last_id={cursor}, processed={processed}")
+
+            return await save_rebuild_progress(self.db, status="completed")
+        except Exception as e:
+            logger.error(f"重建向量时出错: {str(e)}")
+            await self.db.rollback()
+            await save_rebuild_progress(self.db, status="failed", error=str(e))
+            raise
 
     async def delete_document(self, document_id: int) -> bool:
         """删除文档及其相关数据"""
         try:
-            # 检查文档是否存在
+            # 一次性取出所有向量ID（段落记录会随文档级联删除）
             result = await self.db.execute(
-                select(DBDocument).filter(DBDocument.id == document_id)  # 使用 DBDocument
+                select(DBDocumentSegment.chroma_id).where(
+                    DBDocumentSegment.document_id == document_id,
+                    DBDocumentSegment.chroma_id.isnot(None)
+                )
             )
-            document = result.scalar_one_or_none()
-            
-            if not document:
-                return False
+            chroma_ids = list(result.scalars())
             
-            # 删除文档
-            await self.db.execute(
+            # 直接删除文档，根据影响行数判断文档是否存在，无需先查询
+            result = await self.db.execute(
                 delete(DBDocument).where(DBDocument.id == document_id)  # 使用 DBDocument
             )
+            if result.rowcount == 0:
+                await self.db.rollback()
+                return False
             
             await self.db.commit()
+
+            # 单次调用删除向量存储中的对应向量
+            if chroma_ids:
+                await vector_store.delete_embeddings(chroma_ids)
+
             self.logger.info(f"Successfully deleted document {document_id}")
             return True
             
@@ -494,11 +693,30 @@ class DatasetService:
     async def get_document_status(self, document_id: int) -> dict:
         """获取文档处理状态和详细信息"""
         try:
-            # 获取文档信息
+            # 文档信息和段落统计一次查询取回（段落在向量写入成功后才提交，
+            # 因此带 chroma_id 的段落数即已写入向量存储的段落数，轮询时无需再访问 Chroma）
+            segment_counts = (
+                select(
+                    func.count().label("total"),
+                    func.count(DBDocumentSegment.chroma_id).label("embedded")
+                )
+                .where(DBDocumentSegment.document_id == document_id)
+                .subquery()
+            )
             result = await self.db.execute(
-                select(DBDocument).filter(DBDocument.id == document_id)
+                select(
+                    DBDocument.status,
+                    DBDocument.error,
+                    DBDocument.name,
+                    DBDocument.mime_type,
+                    DBDocument.created_at,
+                    segment_counts.c.total,
+                    segment_counts.c.embedded
+                )
+                .join(segment_counts, true())
+                .filter(DBDocument.id == document_id)
             )
-            document = result.scalar_one_or_none()
+            document = result.one_or_none()
             
             if not document:
                 return {
@@ -508,24 +726,14 @@ class DatasetService:
                     "segments_with_embeddings": 0
                 }
 
-            # 获取文档段落信息
-            result = await self.db.execute(
-                select(DBDocumentSegment).filter(DBDocumentSegment.document_id == document_id)
-            )
-            segments = result.scalars().all()
-            
-            # 统计向量生成情况
-            total_segments = len(segments)
-            segments_with_embeddings = len([s for s in segments if s.embedding])
-            
             return {
                 "status": document.status,
                 "error": document.error,
                 "name": document.name,
                 "mime_type": document.mime_type,
-                "segments": total_segments,
-                "segments_with_embeddings": segments_with_embeddings,
-                "created_at": document.created_at.isoformat() if document.created_at else None
+                "segments": document.total,
+                "segments_with_embeddings": document.embedded,
+                "created_at": document.created_at
             }
 
         except Exception as e:
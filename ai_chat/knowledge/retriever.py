@@ -13,14 +13,14 @@ from ..models.types import (
     DocumentSegmentResponse
 )
 from ..services.vector_store import vector_store
-from ..utils.embeddings import EmbeddingFactory
+from ..utils.embeddings import EmbeddingFactory, get_embedding_factory
 
 logger = logging.getLogger(__name__)
 
 class Retriever:
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, embedding_factory: Optional[EmbeddingFactory] = None):
         self.db = db
-        self.embedding_factory = EmbeddingFactory()
+        self.embedding_factory = embedding_factory or get_embedding_factory()
         self.logger = logging.getLogger(__name__)
 
     async def search(self, query: str, limit: int = 5, workspace_id: Optional[int] = None) -> List[Dict]:
@@ -75,7 +75,7 @@ class Retriever:
             select(Document).filter(Document.id == document_id)
         )
         document = result.scalar_one_or_none()
-        return DocumentResponse.from_orm(document) if document else None
+        return DocumentResponse.model_validate(document) if document else None
 
     async def get_segment(self, segment_id: int) -> Optional[DocumentSegmentResponse]:
         """获取文档片段"""
@@ -83,7 +83,7 @@ class Retriever:
             select(DocumentSegment).filter(DocumentSegment.id == segment_id)
         )
         segment = result.scalar_one_or_none()
-        return DocumentSegmentResponse.from_orm(segment) if segment else None
+        return DocumentSegmentResponse.model_validate(segment) if segment else None
 
     async def search_with_embedding(self, query: str, limit: int = 5, workspace_id: Optional[int] = None) -> List[Dict]:
         """搜索相关文档段落"""
@@ -0,0 +1,29 @@
+-- 001: 会话按最后消息时间分页、文档/工作区检索索引、文档-工作区唯一约束
+--
+-- 适用于在这些变更之前就已创建的数据库（init_db 中的 create_all 只会创建
+-- 缺失的表，不会给已有表补列或补索引）。新建的数据库无需执行本脚本。
+-- 执行方式：mysql -u <user> -p <database> < ai_chat/migrations/001_conversation_last_msg_and_indexes.sql
+
+-- 文档去重查找：(file_hash, original_name) 定位最新版本
+CREATE INDEX ix_docs_hash_name_ver ON documents (file_hash, original_name, version DESC);
+
+-- 按工作区列出文档
+CREATE INDEX ix_docws_workspace_document ON document_workspaces (workspace_id, document_id);
+
+-- 会话列表按最后消息时间排序/分页，并用已有消息回填
+ALTER TABLE conversations ADD COLUMN last_msg_sent_at DATETIME NULL;
+UPDATE conversations c
+SET last_msg_sent_at = (SELECT MAX(m.created_at) FROM messages m WHERE m.conversation_id = c.id);
+CREATE INDEX ix_conversations_workspace_last_msg ON conversations (workspace_id, last_msg_sent_at DESC);
+
+-- 名称/描述全文检索
+CREATE FULLTEXT INDEX ix_docs_fulltext ON documents (original_name, description) WITH PARSER ngram;
+CREATE FULLTEXT INDEX ix_workgroups_fulltext ON workgroups (name, description) WITH PARSER ngram;
+CREATE FULLTEXT INDEX ix_workspaces_fulltext ON workspaces (name, description) WITH PARSER ngram;
+
+-- 文档-工作区关联去重后加唯一约束
+DELETE a FROM document_workspaces a
+JOIN document_workspaces b
+  ON a.document_id = b.document_id AND a.workspace_id = b.workspace_id AND a.id > b.id;
+ALTER TABLE document_workspaces
+  ADD CONSTRAINT uq_docws_document_workspace UNIQUE (document_id, workspace_id);
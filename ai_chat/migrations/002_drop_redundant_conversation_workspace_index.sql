@@ -0,0 +1,6 @@
+-- 002: 删除多余的 conversations.workspace_id 单列索引
+--
+-- 只适用于通过 create_all 建表、带有 ix_conversations_workspace_id 索引的数据库；
+-- 复合索引 ix_conversations_workspace_last_msg 以 workspace_id 为前导列，已覆盖该索引的用途（含外键）。
+-- 需先执行 001。没有该索引的数据库跳过本脚本即可。
+DROP INDEX ix_conversations_workspace_id ON conversations;
@@ -0,0 +1,5 @@
+-- 003: documents.updated_at（启动时判断解析是否中断，避免多进程重复处理同一文档）
+--
+-- 适用于在此变更之前创建的数据库，需先执行 001。
+ALTER TABLE documents ADD COLUMN updated_at DATETIME NULL;
+UPDATE documents SET updated_at = created_at;
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, JSON
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, JSON, Index, text
 from sqlalchemy.orm import relationship
 
 from ..database import Base
@@ -24,15 +24,20 @@ class Dataset(Base):
 
 class Conversation(Base):
     __tablename__ = "conversations"
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        # 按工作空间列出最近活跃的对话；workspace_id 为前导列，同时满足按工作空间过滤和外键所需的索引
+        Index('ix_conversations_workspace_last_msg', 'workspace_id', text('last_msg_sent_at DESC')),
+        {'extend_existing': True}
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255))
     workspace_id = Column(Integer, ForeignKey("workspaces.id"), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    last_msg_sent_at = Column(DateTime, nullable=True)  # 最后一条消息的时间，发送消息时更新
 
     # 关联
-    messages = relationship("Message", back_populates="conversation", cascade="all, delete-orphan")
+    messages = relationship("Message", back_populates="conversation", cascade="all, delete-orphan", order_by="Message.id")
     workspace = relationship(
         "ai_chat.models.workspace.Workspace",
         back_populates="conversations"
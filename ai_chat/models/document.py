@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Float
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Float, Index, UniqueConstraint, text
 from sqlalchemy.orm import relationship
 
 from ..database import Base
@@ -8,7 +8,16 @@ from ..database import Base
 
 class Document(Base):
     __tablename__ = "documents"
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        # 按 (file_hash, original_name) 查找最新版本
+        Index('ix_docs_hash_name_ver', 'file_hash', 'original_name', text('version DESC')),
+        # 文档名称/描述搜索（ngram 分词支持中文）
+        Index(
+            'ix_docs_fulltext', 'original_name', 'description',
+            mysql_prefix='FULLTEXT', mysql_with_parser='ngram'
+        ),
+        {'extend_existing': True}
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     dataset_id = Column(Integer, ForeignKey("datasets.id"))
@@ -25,6 +34,7 @@ class Document(Base):
     status = Column(String(50), default="pending")
     error = Column(Text)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # 状态变化时间，用于判断处理是否中断
 
     # 添加 dataset 关系
     dataset = relationship(
@@ -78,7 +88,13 @@ class DocumentSegment(Base):
 
 class DocumentWorkspace(Base):
     __tablename__ = "document_workspaces"
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        # 按工作空间查找文档（检索过滤、文档计数）时走覆盖索引
+        Index('ix_docws_workspace_document', 'workspace_id', 'document_id'),
+        # 同一文档与工作空间只关联一次，关联时据此跳过已存在的记录
+        UniqueConstraint('document_id', 'workspace_id', name='uq_docws_document_workspace'),
+        {'extend_existing': True}
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"))
@@ -86,4 +102,17 @@ class DocumentWorkspace(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
     document = relationship("Document", back_populates="workspaces")
-    workspace = relationship("Workspace", back_populates="documents") 
\ No newline at end of file
+    workspace = relationship("Workspace", back_populates="documents") 
+
+
+class VectorRebuildState(Base):
+    """向量重建进度（只有一行），落库以便进程重启或多进程部署时查询和续跑"""
+    __tablename__ = "vector_rebuild_state"
+    __table_args__ = {'extend_existing': True}
+
+    id = Column(Integer, primary_key=True)
+    status = Column(String(50), nullable=False, default="idle")
+    last_id = Column(Integer, nullable=False, default=0)  # 已处理的最后一个段落ID
+    processed = Column(Integer, nullable=False, default=0)
+    error = Column(Text)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -1,28 +1,26 @@
 from datetime import datetime
 from typing import Optional, List
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, field_serializer
 
 
 class Message(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     conversation_id: int
     content: str
     role: str
     created_at: datetime
 
-    class Config:
-        from_attributes = True
-
 class Conversation(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     title: Optional[str] = None
     created_at: datetime
     messages: List[Message] = []
 
-    class Config:
-        from_attributes = True
-
 class MessageBase(BaseModel):
     content: str
     role: str
@@ -31,13 +29,12 @@ class MessageCreate(MessageBase):
     conversation_id: int
 
 class MessageResponse(MessageBase):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     conversation_id: int
     created_at: datetime
 
-    class Config:
-        from_attributes = True
-
 class ConversationBase(BaseModel):
     title: Optional[str] = None
 
@@ -45,66 +42,90 @@ class ConversationCreate(ConversationBase):
     pass
 
 class ConversationResponse(ConversationBase):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     created_at: datetime
     messages: List[MessageResponse] = []
 
-    class Config:
-        from_attributes = True
-
 class Dataset(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     name: str
     description: Optional[str] = None
     created_at: datetime
 
-    class Config:
-        from_attributes = True
-
 class WorkspaceInfo(BaseModel):
     """工作空间信息"""
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     name: str
     description: Optional[str] = None
 
-class Document(BaseModel):
+def format_size(size_in_bytes: int) -> str:
+    """将字节大小转换为人类可读的格式（KB或MB）"""
+    if size_in_bytes < 1024 * 1024:  # 小于1MB
+        return f"{size_in_bytes / 1024:.1f}KB"
+    else:
+        return f"{size_in_bytes / (1024 * 1024):.1f}MB"
+
+class DocumentSummary(BaseModel):
+    """文档列表项（不含全文内容）"""
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     dataset_id: int
     name: str
-    content: Optional[str] = None
     mime_type: str
     status: str
-    size: str
+    size: Optional[int] = None  # 字节数，序列化为 "1.5MB" 形式
     version: int
-    file_hash: str
+    file_hash: Optional[str] = None  # 完整哈希，序列化时只输出前8位
     error: Optional[str] = None
-    created_at: Optional[str] = None
+    created_at: Optional[datetime] = None
     creator: str = "admin"
     workspaces: List[WorkspaceInfo] = []  # 添加工作空间列表字段
 
-    class Config:
-        from_attributes = True
+    @field_serializer('size')
+    def _serialize_size(self, size: Optional[int]) -> str:
+        return format_size(size) if size else "0KB"
+
+    @field_serializer('file_hash')
+    def _serialize_file_hash(self, file_hash: Optional[str]) -> Optional[str]:
+        return file_hash[:8] if file_hash else None
+
+class Document(DocumentSummary):
+    """文档详情（含全文内容）"""
+    content: Optional[str] = None
+
+class BatchUploadResult(BaseModel):
+    """批量上传中单个文件的结果，成功时带文档信息，失败时带错误原因"""
+    filename: str
+    document: Optional[Document] = None
+    error: Optional[str] = None
 
 class DocumentSegmentCreate(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: Optional[int] = None
     document_id: int
     content: str
     embedding: Optional[str] = None
     created_at: Optional[datetime] = None
 
-    class Config:
-        from_attributes = True
-
 class DocumentSegment(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     document_id: int
     content: str
     created_at: Optional[datetime] = None
 
-    class Config:
-        from_attributes = True
-
 class DocumentResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     name: str
     content: Optional[str] = None
@@ -113,14 +134,10 @@ class DocumentResponse(BaseModel):
     error: Optional[str] = None
     created_at: Optional[datetime] = None
 
-    class Config:
-        from_attributes = True
-
 class DocumentSegmentResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     document_id: int
     content: str
     created_at: Optional[datetime] = None
-
-    class Config:
-        from_attributes = True 
\ No newline at end of file
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 
 from ..database import Base
@@ -8,7 +8,14 @@ from ..database import Base
 
 class Workgroup(Base):
     __tablename__ = "workgroups"
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        # 工作组名称/描述搜索（ngram 分词支持中文）
+        Index(
+            'ix_workgroups_fulltext', 'name', 'description',
+            mysql_prefix='FULLTEXT', mysql_with_parser='ngram'
+        ),
+        {'extend_existing': True}
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False)
@@ -22,7 +29,14 @@ class Workgroup(Base):
 
 class Workspace(Base):
     __tablename__ = "workspaces"
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        # 工作空间名称/描述搜索（ngram 分词支持中文）
+        Index(
+            'ix_workspaces_fulltext', 'name', 'description',
+            mysql_prefix='FULLTEXT', mysql_with_parser='ngram'
+        ),
+        {'extend_existing': True}
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False)
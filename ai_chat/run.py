@@ -1,4 +1,5 @@
 import logging
+import sys
 
 import uvicorn
 
@@ -19,6 +20,9 @@ def main():
             port=8000,
             reload=True,
             reload_dirs=["ai_chat"],
+            # uvloop 不支持 Windows
+            loop="asyncio" if sys.platform == "win32" else "uvloop",
+            http="httptools",
             log_level="info"
         )
     except Exception as e:
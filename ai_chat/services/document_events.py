@@ -0,0 +1,45 @@
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Any, Dict, Set
+
+logger = logging.getLogger(__name__)
+
+# 文档处理的终止状态，到达后不再有后续事件
+TERMINAL_DOCUMENT_STATUSES = frozenset({"processed", "error"})
+
+
+class DocumentEventBus:
+    """文档状态变更的进程内发布/订阅
+
+    后台处理任务在状态变化时发布事件，SSE 接口按文档ID订阅，
+    客户端无需轮询状态接口。
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = defaultdict(set)
+
+    def subscribe(self, document_id: int) -> asyncio.Queue:
+        """订阅指定文档的状态事件"""
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers[document_id].add(queue)
+        return queue
+
+    def unsubscribe(self, document_id: int, queue: asyncio.Queue) -> None:
+        """取消订阅"""
+        queues = self._subscribers.get(document_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[document_id]
+
+    def publish(self, document_id: int, event: Dict[str, Any]) -> None:
+        """向所有订阅者推送事件"""
+        for queue in self._subscribers.get(document_id, ()):
+            queue.put_nowait(event)
+        logger.debug(f"Published event for document {document_id}: {event}")
+
+
+# 创建全局实例
+document_events = DocumentEventBus()
@@ -3,12 +3,11 @@ import json
 import logging
 import re
 import time
-from collections import OrderedDict
 from datetime import datetime
 from typing import List, Dict, Optional
 
 from sqlalchemy import select, update
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..api.schemas.template import (
     TemplateCreate,
@@ -16,37 +15,16 @@ from ..api.schemas.template import (
     TemplateUsageResponse,
     TemplateVariable
 )
-from ..chat.llm_factory import get_llm_service
+from ..chat.llm_factory import LLM, get_llm_service
 from ..models.template import Template
+from ..utils.cache import LRUCache
 
 logger = logging.getLogger(__name__)
 
-class LRUCache:
-    """简单的LRU缓存实现"""
-    def __init__(self, capacity: int = 100):
-        self.cache = OrderedDict()
-        self.capacity = capacity
-        
-    def get(self, key):
-        if key not in self.cache:
-            return None
-        # 移动到最近使用
-        value = self.cache.pop(key)
-        self.cache[key] = value
-        return value
-        
-    def put(self, key, value):
-        if key in self.cache:
-            self.cache.pop(key)
-        elif len(self.cache) >= self.capacity:
-            # 移除最近最少使用的项
-            self.cache.popitem(last=False)
-        self.cache[key] = value
-
 class TemplateService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession, llm_service: Optional[LLM] = None):
         self.db = db
-        self.llm_service = get_llm_service()
+        self.llm_service = llm_service or get_llm_service()
         self._json_cache = LRUCache(capacity=50)  # 限制缓存大小为50项
     
     def _extract_json(self, text: str) -> Dict:
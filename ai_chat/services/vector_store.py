@@ -50,7 +50,7 @@ class VectorStore:
         try:
             # 添加前记录当前集合状态
             try:
-                current_count = len(self.collection.get()['ids'])
+                current_count = self.collection.count()
                 vector_logger.info(f"Current documents in collection before adding: {current_count}")
             except Exception as e:
                 vector_logger.info(f"Collection might be empty: {str(e)}")
@@ -67,7 +67,7 @@ class VectorStore:
 
             # 添加后确认
             try:
-                new_count = len(self.collection.get()['ids'])
+                new_count = self.collection.count()
                 vector_logger.info(f"Total documents in collection after adding: {new_count}")
             except Exception as e:
                 vector_logger.error(f"Error checking collection after adding: {str(e)}")
@@ -215,6 +215,44 @@ class VectorStore:
             vector_logger.error(f"Error updating embedding: {str(e)}")
             raise
     
+    async def upsert_embeddings(
+        self,
+        ids: List[str],
+        embeddings: List[List[float]],
+        documents: List[str],
+        metadatas: Optional[List[Dict[str, Any]]] = None
+    ) -> None:
+        """
+        批量写入embedding，已存在的ID直接覆盖（无需先删除）
+        """
+        vector_logger.info(f"Upserting {len(ids)} embeddings")
+        try:
+            self.collection.upsert(
+                ids=ids,
+                embeddings=embeddings,
+                documents=documents,
+                metadatas=metadatas
+            )
+        except Exception as e:
+            vector_logger.error(f"Error upserting embeddings: {str(e)}")
+            raise
+
+    async def reset_collection(self) -> None:
+        """
+        删除并重建collection以清空所有向量（无需先取出全部ID）
+        """
+        vector_logger.info(f"Resetting collection: {settings.COLLECTION_NAME}")
+        try:
+            self.client.delete_collection(settings.COLLECTION_NAME)
+            self.collection = self.client.create_collection(
+                name=settings.COLLECTION_NAME,
+                metadata={"hnsw:space": "cosine"}  # 使用余弦距离
+            )
+            vector_logger.info(f"Successfully reset collection: {settings.COLLECTION_NAME}")
+        except Exception as e:
+            vector_logger.error(f"Error resetting collection: {str(e)}")
+            raise
+
     async def get_embeddings(self, ids: List[str]) -> Dict[str, Any]:
         """
         获取指定ID的embedding
@@ -228,6 +266,20 @@ class VectorStore:
             vector_logger.error(f"Error getting embeddings: {str(e)}")
             raise
 
+    async def get_metadatas(self, ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        获取指定ID已有的元数据（只取元数据，不读取向量和文本），不存在的ID不在结果中
+        """
+        try:
+            results = self.collection.get(ids=ids, include=["metadatas"])
+            return {
+                id: metadata or {}
+                for id, metadata in zip(results['ids'], results['metadatas'] or [])
+            }
+        except Exception as e:
+            vector_logger.error(f"Error getting metadatas: {str(e)}")
+            raise
+
 # 创建全局实例
 vector_store = VectorStore()
 
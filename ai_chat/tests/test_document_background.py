@@ -0,0 +1,137 @@
+import io
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import UploadFile
+from sqlalchemy import func, select, update
+
+from ..api.document import (
+    DOCUMENT_RESUME_STALE_SECONDS,
+    _process_document_in_background,
+    resume_unfinished_documents
+)
+from ..knowledge import dataset_service as dataset_service_module
+from ..knowledge.dataset_service import DatasetService
+from ..models.dataset import Dataset
+from ..models.document import Document, DocumentSegment
+
+
+class FakeEmbeddingFactory:
+    """固定维度的假 embedding，不请求外部接口"""
+
+    def __init__(self, error=None):
+        self.error = error
+
+    async def get_embeddings(self, texts):
+        if self.error:
+            raise self.error
+        return [[0.1, 0.2, 0.3] for _ in texts]
+
+
+@pytest.fixture
+def vector_calls(monkeypatch):
+    """记录写入向量存储的调用，不访问 Chroma"""
+    calls = []
+
+    async def fake_add_embeddings(ids, embeddings, documents, metadatas=None):
+        calls.append(ids)
+
+    monkeypatch.setattr(dataset_service_module.vector_store, "add_embeddings", fake_add_embeddings)
+    return calls
+
+
+async def _upload_text_document(session, tmp_path, monkeypatch) -> int:
+    """通过 create_document 上传一个文本文件，返回处于 pending 状态的文档ID"""
+    monkeypatch.chdir(tmp_path)
+    dataset = Dataset(name="default", description="Default dataset")
+    session.add(dataset)
+    await session.commit()
+
+    upload = UploadFile(file=io.BytesIO("第一段内容。\n\n第二段内容。".encode("utf-8")), filename="note.txt")
+    document = await DatasetService(session).create_document(
+        file=upload,
+        filename="note.txt",
+        mime_type="text/plain",
+        dataset_id=dataset.id
+    )
+    assert document.status == "pending"
+    return document.id
+
+
+async def _document_status(session, document_id):
+    result = await session.execute(
+        select(Document.status, Document.error).where(Document.id == document_id)
+    )
+    return result.one()
+
+
+@pytest.mark.asyncio
+async def test_background_processing_marks_document_processed(test_session, tmp_path, monkeypatch, vector_calls):
+    """上传后后台任务完成解析和向量化：pending -> processed"""
+    monkeypatch.setattr(DatasetService, "embedding_factory", FakeEmbeddingFactory())
+    document_id = await _upload_text_document(test_session, tmp_path, monkeypatch)
+
+    # 后台任务使用请求会话的 bind（即测试引擎）新建会话
+    await _process_document_in_background(document_id, test_session.bind)
+
+    test_session.expire_all()
+    status, error = await _document_status(test_session, document_id)
+    assert status == "processed"
+    assert error is None
+    segment_count = await test_session.scalar(
+        select(func.count()).where(DocumentSegment.document_id == document_id)
+    )
+    assert segment_count > 0
+    assert sum(len(ids) for ids in vector_calls) == segment_count
+
+
+@pytest.mark.asyncio
+async def test_background_processing_marks_document_error(test_session, tmp_path, monkeypatch, vector_calls):
+    """embedding 失败时文档标记为 error，且不留下段落：pending -> error"""
+    monkeypatch.setattr(DatasetService, "embedding_factory", FakeEmbeddingFactory(RuntimeError("embedding unavailable")))
+    document_id = await _upload_text_document(test_session, tmp_path, monkeypatch)
+
+    await _process_document_in_background(document_id, test_session.bind)
+
+    test_session.expire_all()
+    status, error = await _document_status(test_session, document_id)
+    assert status == "error"
+    assert "embedding unavailable" in error
+    segment_count = await test_session.scalar(
+        select(func.count()).where(DocumentSegment.document_id == document_id)
+    )
+    assert segment_count == 0
+    assert vector_calls == []
+
+
+@pytest.mark.asyncio
+async def test_resume_skips_recently_updated_documents(test_session, tmp_path, monkeypatch, vector_calls):
+    """刚上传或其他进程正在处理的文档不会被启动时的恢复抢占"""
+    monkeypatch.setattr(DatasetService, "embedding_factory", FakeEmbeddingFactory())
+    document_id = await _upload_text_document(test_session, tmp_path, monkeypatch)
+
+    assert await resume_unfinished_documents(test_session.bind) == 0
+
+    test_session.expire_all()
+    status, _ = await _document_status(test_session, document_id)
+    assert status == "pending"
+    assert vector_calls == []
+
+
+@pytest.mark.asyncio
+async def test_resume_unfinished_documents(test_session, tmp_path, monkeypatch, vector_calls):
+    """启动时重新处理长时间停留在 pending 的文档，且只处理一次"""
+    monkeypatch.setattr(DatasetService, "embedding_factory", FakeEmbeddingFactory())
+    document_id = await _upload_text_document(test_session, tmp_path, monkeypatch)
+    stale = datetime.utcnow() - timedelta(seconds=DOCUMENT_RESUME_STALE_SECONDS + 60)
+    await test_session.execute(
+        update(Document).where(Document.id == document_id).values(created_at=stale, updated_at=stale)
+    )
+    await test_session.commit()
+
+    assert await resume_unfinished_documents(test_session.bind) == 1
+
+    test_session.expire_all()
+    status, _ = await _document_status(test_session, document_id)
+    assert status == "processed"
+    assert await resume_unfinished_documents(test_session.bind) == 0
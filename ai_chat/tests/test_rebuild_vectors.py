@@ -0,0 +1,59 @@
+import pytest
+
+from ..knowledge import dataset_service as dataset_service_module
+from ..knowledge.dataset_service import DatasetService
+from ..models.document import Document, DocumentSegment
+
+
+class FakeEmbeddingFactory:
+    """固定维度的假 embedding，不请求外部接口"""
+
+    async def get_embeddings(self, texts):
+        return [[0.1, 0.2, 0.3] for _ in texts]
+
+
+@pytest.mark.asyncio
+async def test_rebuild_keeps_segment_metadata(test_session, monkeypatch):
+    """重建向量时保留只存在于向量存储中的段落元数据（如 is_table）"""
+    document = Document(name="表格.pdf", original_name="表格.pdf")
+    test_session.add(document)
+    await test_session.flush()
+    test_session.add(DocumentSegment(
+        document_id=document.id,
+        content="日期 01/02/2024 金额 100",
+        chroma_id=f"doc_{document.id}_seg_0",
+        page_number=1
+    ))
+    await test_session.commit()
+
+    stored = {
+        f"doc_{document.id}_seg_0": {
+            "document_id": str(document.id),
+            "segment_id": "0",
+            "page_number": 1,
+            "is_table": True,
+            "content_type": "table"
+        }
+    }
+    upserted = []
+
+    async def fake_get_metadatas(ids):
+        return {id: stored[id] for id in ids if id in stored}
+
+    async def fake_upsert_embeddings(ids, embeddings, documents, metadatas=None):
+        upserted.extend(zip(ids, metadatas))
+
+    monkeypatch.setattr(DatasetService, "embedding_factory", FakeEmbeddingFactory())
+    monkeypatch.setattr(dataset_service_module.vector_store, "get_metadatas", fake_get_metadatas)
+    monkeypatch.setattr(dataset_service_module.vector_store, "upsert_embeddings", fake_upsert_embeddings)
+
+    progress = await DatasetService(test_session).rebuild_vectors()
+
+    assert progress["status"] == "completed"
+    assert len(upserted) == 1
+    chroma_id, metadata = upserted[0]
+    assert chroma_id == f"doc_{document.id}_seg_0"
+    assert metadata["is_table"] is True
+    assert metadata["content_type"] == "table"
+    # 基础字段以数据库中的段落为准
+    assert metadata["document_id"] == str(document.id)
@@ -0,0 +1,66 @@
+import pytest
+
+from ..chat.conversation_service import CITATIONS_MARKER, ConversationService
+
+
+class FakeStreamLLM:
+    """按给定分片依次产出回复的假 LLM"""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    async def chat_stream(self, system, history, message):
+        for chunk in self.chunks:
+            yield chunk
+
+
+def _make_service(chunks, saved):
+    service = ConversationService(
+        db=None,
+        llm=FakeStreamLLM(chunks),
+        conversation_manager=object(),
+        retriever=object()
+    )
+
+    async def fake_prepare_reply(conversation_id, message_content, use_rag):
+        return "system", [], []
+
+    async def fake_save_assistant_message(conversation_id, response, relevant_docs):
+        saved.append(response)
+        return {"conversation_id": conversation_id, "content": response}
+
+    service._prepare_reply = fake_prepare_reply
+    service._save_assistant_message = fake_save_assistant_message
+    return service
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "chunks, expected",
+    [
+        # 引用标记被拆在两个分片中
+        (["根据文档，答案是42。", "\n###CITA", "TIONS:[1]"], "根据文档，答案是42。\n"),
+        # 引用标记被拆在三个分片中
+        (["回答内容", "###", "CITATI", "ONS:", "[1, 2]"], "回答内容"),
+        # 回复以引用标记开头
+        ([CITATIONS_MARKER + "[1]"], ""),
+        (["###CIT", "ATIONS:[]"], ""),
+        # 没有引用标记，末尾暂缓推送的内容最终也要推送
+        (["第一段", "第二段", "###"], "第一段第二段###"),
+        (["a###CIT", "b"], "a###CITb"),
+    ]
+)
+async def test_stream_message_hides_citations_marker(chunks, expected):
+    """拼接所有 delta 应等于去掉引用标记后的回复"""
+    saved = []
+    service = _make_service(chunks, saved)
+
+    events = [event async for event in service.stream_message(1, "问题", use_rag=False)]
+
+    deltas = [event["content"] for event in events if event["type"] == "delta"]
+    assert "".join(deltas) == expected
+    assert all(deltas)
+    assert not any(CITATIONS_MARKER in delta for delta in deltas)
+    # 最后一个事件是保存后的完整消息，保存的是包含引用标记的原始回复
+    assert events[-1]["type"] == "message"
+    assert saved == ["".join(chunks)]
@@ -0,0 +1,118 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy import event, func, select
+
+from ..api.schemas.workspace import WorkspaceAssociationRequest
+from ..api.workspace import link_document_workspace
+from ..models.document import Document, DocumentWorkspace
+from ..models.workspace import Workgroup, Workspace
+
+
+@pytest_asyncio.fixture
+async def link_fixture(test_session):
+    """创建一个工作组、三个工作空间和三个文档，返回 (文档ID列表, 工作空间ID列表)"""
+    workgroup = Workgroup(name="测试工作组")
+    test_session.add(workgroup)
+    await test_session.flush()
+    workspaces = [Workspace(name=f"工作空间{i}", group_id=workgroup.id) for i in range(3)]
+    documents = [Document(name=f"文档{i}.txt", original_name=f"文档{i}.txt") for i in range(3)]
+    test_session.add_all(workspaces + documents)
+    await test_session.commit()
+    return [document.id for document in documents], [workspace.id for workspace in workspaces]
+
+
+async def _link(session, document_ids, workspace_ids):
+    return await link_document_workspace(
+        WorkspaceAssociationRequest(document_ids=document_ids, workspace_ids=workspace_ids),
+        db=session
+    )
+
+
+async def _links(session):
+    """读取全部关联 {(document_id, workspace_id): id}，读取后结束事务以便下一次调用开启新事务"""
+    result = await session.execute(
+        select(DocumentWorkspace.document_id, DocumentWorkspace.workspace_id, DocumentWorkspace.id)
+    )
+    links = {(row.document_id, row.workspace_id): row.id for row in result.all()}
+    await session.commit()
+    return links
+
+
+@pytest.fixture
+def write_statements(test_session):
+    """记录执行的 INSERT/DELETE 语句"""
+    statements = []
+    sync_engine = test_session.bind.sync_engine
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("INSERT", "DELETE", "UPDATE")):
+            statements.append(statement)
+
+    event.listen(sync_engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(sync_engine, "before_cursor_execute", record)
+
+
+@pytest.mark.asyncio
+async def test_link_unchanged_set_writes_nothing(test_session, link_fixture, write_statements):
+    """关联集合未变化时不执行任何写入"""
+    (d1, d2, _), (w1, w2, _) = link_fixture
+    await _link(test_session, [d1, d2], [w1, w2])
+    before = await _links(test_session)
+    write_statements.clear()
+
+    response = await _link(test_session, [d1, d2], [w1, w2])
+
+    assert response["message"] == "Document workspace links unchanged"
+    assert write_statements == []
+    assert await _links(test_session) == before
+
+
+@pytest.mark.asyncio
+async def test_link_adds_workspace_and_keeps_existing_rows(test_session, link_fixture):
+    """新增工作空间时只插入新关联，已有关联行保持不变"""
+    (d1, _, _), (w1, w2, _) = link_fixture
+    await _link(test_session, [d1], [w1])
+    before = await _links(test_session)
+
+    await _link(test_session, [d1], [w1, w2])
+
+    after = await _links(test_session)
+    assert set(after) == {(d1, w1), (d1, w2)}
+    assert after[(d1, w1)] == before[(d1, w1)]
+
+
+@pytest.mark.asyncio
+async def test_link_removes_workspace_only_for_requested_documents(test_session, link_fixture):
+    """移除工作空间只删除请求中文档的多余关联，不影响其他文档"""
+    (d1, d2, _), (w1, w2, _) = link_fixture
+    await _link(test_session, [d1], [w1, w2])
+    await _link(test_session, [d2], [w1])
+
+    await _link(test_session, [d1], [w2])
+
+    assert set(await _links(test_session)) == {(d1, w2), (d2, w1)}
+
+
+@pytest.mark.asyncio
+async def test_link_empty_workspace_ids_clears_document_links(test_session, link_fixture):
+    """workspace_ids 为空时清除这些文档的全部关联"""
+    (d1, d2, d3), (w1, w2, w3) = link_fixture
+    await _link(test_session, [d1, d2], [w1, w2])
+    await _link(test_session, [d3], [w3])
+
+    await _link(test_session, [d1, d2], [])
+
+    assert set(await _links(test_session)) == {(d3, w3)}
+
+
+@pytest.mark.asyncio
+async def test_link_duplicate_ids_create_each_pair_once(test_session, link_fixture):
+    """请求中的重复ID不会产生重复关联，也不会违反唯一约束"""
+    (d1, _, _), (w1, w2, _) = link_fixture
+
+    await _link(test_session, [d1, d1], [w1, w1, w2])
+
+    row_count = await test_session.scalar(select(func.count()).select_from(DocumentWorkspace))
+    assert row_count == 2
+    assert set(await _links(test_session)) == {(d1, w1), (d1, w2)}
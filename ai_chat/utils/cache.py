@@ -0,0 +1,30 @@
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+class LRUCache:
+    """简单的LRU缓存实现（可选过期时间）"""
+    def __init__(self, capacity: int = 100, ttl: Optional[float] = None):
+        self.cache = OrderedDict()
+        self.capacity = capacity
+        self.ttl = ttl  # 过期秒数，None 表示不过期
+        
+    def get(self, key):
+        if key not in self.cache:
+            return None
+        value, expires_at = self.cache.pop(key)
+        if expires_at is not None and expires_at < time.monotonic():
+            return None
+        # 移动到最近使用
+        self.cache[key] = (value, expires_at)
+        return value
+        
+    def put(self, key, value):
+        if key in self.cache:
+            self.cache.pop(key)
+        elif len(self.cache) >= self.capacity:
+            # 移除最近最少使用的项
+            self.cache.popitem(last=False)
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        self.cache[key] = (value, expires_at)
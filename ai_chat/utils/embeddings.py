@@ -1,5 +1,7 @@
+import asyncio
 import logging
 import time
+from functools import lru_cache
 from typing import List, Union, Optional
 
 import aiohttp
@@ -10,6 +12,10 @@ from ..config import settings
 
 logger = logging.getLogger(__name__)
 
+# 每批最多发送的文本数，以及同时在途的批次数
+EMBEDDING_BATCH_SIZE = 64
+EMBEDDING_MAX_CONCURRENCY = 8
+
 async def get_embedding(texts: Union[str, List[str]]) -> List[List[float]]:
     """使用 text-embedding-3-small 模型获取文本向量"""
     # 确保输入是列表格式
@@ -21,19 +27,20 @@ async def get_embedding(texts: Union[str, List[str]]) -> List[List[float]]:
         "Content-Type": "application/json"
     }
     
-    # 批量处理，每批最多20个文本
-    batch_size = 20
-    all_embeddings = []
-    
-    for i in range(0, len(texts), batch_size):
-        batch_texts = texts[i:i + batch_size]
+    # 批量处理，各批次并发请求（受信号量限制），结果按原顺序拼接
+    batches = [
+        texts[i:i + EMBEDDING_BATCH_SIZE]
+        for i in range(0, len(texts), EMBEDDING_BATCH_SIZE)
+    ]
+    semaphore = asyncio.Semaphore(EMBEDDING_MAX_CONCURRENCY)
+
+    async def process(session: aiohttp.ClientSession, index: int, batch_texts: List[str]) -> List[List[float]]:
         data = {
             "model": settings.EMBEDDING_MODEL,
             "input": batch_texts
         }
-        
-        try:
-            async with aiohttp.ClientSession() as session:
+        async with semaphore:
+            try:
                 async with session.post(
                     settings.OPENAI_EMBEDDING_URL,
                     headers=headers,
@@ -42,12 +49,19 @@ async def get_embedding(texts: Union[str, List[str]]) -> List[List[float]]:
                     if response.status != 200:
                         raise Exception(f"API error: {await response.text()}")
                     result = await response.json()
-                    batch_embeddings = [item["embedding"] for item in result["data"]]
-                    all_embeddings.extend(batch_embeddings)
-        except Exception as e:
-            logger.error(f"Error in batch {i//batch_size}: {str(e)}")
-            raise
-    
+                    return [item["embedding"] for item in result["data"]]
+            except Exception as e:
+                logger.error(f"Error in batch {index}: {str(e)}")
+                raise
+
+    async with aiohttp.ClientSession() as session:
+        results = await asyncio.gather(
+            *(process(session, i, batch) for i, batch in enumerate(batches))
+        )
+
+    all_embeddings = []
+    for batch_embeddings in results:
+        all_embeddings.extend(batch_embeddings)
     return all_embeddings
 
 class EmbeddingFactory:
@@ -155,4 +169,9 @@ async def get_embeddings(text: str, model: str = None, max_retries: int = 3) ->
             
     return None
 
-__all__ = ['EmbeddingFactory', 'get_embeddings'] 
\ No newline at end of file
+@lru_cache(maxsize=1)
+def get_embedding_factory() -> EmbeddingFactory:
+    """获取共享的 EmbeddingFactory 实例"""
+    return EmbeddingFactory()
+
+__all__ = ['EmbeddingFactory', 'get_embedding_factory', 'get_embeddings'] 
\ No newline at end of file
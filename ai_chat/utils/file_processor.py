@@ -1,8 +1,11 @@
 import logging
 import os
 import re
+from types import MappingProxyType
 from typing import Optional, Tuple, List, Dict, Any
 
+import chardet
+import fitz  # PyMuPDF
 import markdown
 import pdfplumber
 from docx import Document as DocxDocument  # 重命名以避免冲突
@@ -11,6 +14,25 @@ from .text_splitter import TextBlock
 
 logger = logging.getLogger(__name__)
 
+# 常用MIME类型常量
+MIME_PDF = 'application/pdf'
+MIME_DOCX = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+MIME_DOC = 'application/msword'
+MIME_MARKDOWN = 'text/markdown'
+MIME_TEXT = 'text/plain'
+
+# 文件扩展名与MIME类型映射（模块加载时构建一次，只读）
+EXT_TO_MIME = MappingProxyType({
+    '.pdf': MIME_PDF,
+    '.docx': MIME_DOCX,
+    '.doc': MIME_DOC,
+    '.md': MIME_MARKDOWN,
+    '.txt': MIME_TEXT
+})
+
+# process_file 能够解析的MIME类型（旧版 .doc 不支持）
+SUPPORTED_MIME_TYPES = frozenset({MIME_PDF, MIME_DOCX, MIME_MARKDOWN, MIME_TEXT})
+
 class PDFProcessor:
     def __init__(self):
         self.line_margin = 3  # 行间距容差
@@ -428,7 +450,7 @@ def process_file(file_path: str) -> Tuple[str, str, List[Dict[str, Any]]]:
         raise FileNotFoundError(f"文件不存在: {file_path}")
     
     try:
-        if mime_type == 'application/pdf':
+        if mime_type == MIME_PDF:
             processor = PDFProcessor()
             content, text_blocks = processor.process_pdf(file_path)
             # 将TextBlock对象转换为字典
@@ -443,10 +465,10 @@ def process_file(file_path: str) -> Tuple[str, str, List[Dict[str, Any]]]:
                 for block in text_blocks
             ]
             return content, mime_type, blocks_dict
-        elif mime_type == 'application/vnd.openxmlformats-officedocument.wordprocessingml.document':
+        elif mime_type == MIME_DOCX:
             content, text_blocks = process_docx(file_path)
             return content, mime_type, text_blocks
-        elif mime_type == 'text/markdown' or file_path.endswith('.md'):
+        elif mime_type == MIME_MARKDOWN:
             content, text_blocks = process_markdown(file_path)
             return content, mime_type, text_blocks
         elif mime_type.startswith('text/'):
@@ -488,14 +510,24 @@ def process_text(file_path: str) -> Tuple[str, List[Dict[str, Any]]]:
     except Exception as e:
         raise Exception(f"处理文本文件时出错: {str(e)}") 
 
+def extract_pdf_text(file_path: str) -> str:
+    """使用 PyMuPDF 逐页提取PDF纯文本（用于内容预览）"""
+    with fitz.open(file_path) as pdf:
+        return "\n".join(page.get_text("text") for page in pdf)
+
+def decode_text(data: bytes) -> str:
+    """解码文本文件内容，优先 UTF-8，失败时检测编码"""
+    try:
+        return data.decode('utf-8')
+    except UnicodeDecodeError:
+        encoding = chardet.detect(data).get('encoding') or 'utf-8'
+        return data.decode(encoding, errors='replace')
+
+def validate_file_type(filename: str) -> bool:
+    """根据扩展名判断文件类型是否可被解析"""
+    return get_mime_type(filename) in SUPPORTED_MIME_TYPES
+
 def get_mime_type(file_path: str) -> str:
     """根据文件扩展名获取MIME类型"""
     ext = os.path.splitext(file_path)[1].lower()
-    mime_types = {
-        '.pdf': 'application/pdf',
-        '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-        '.doc': 'application/msword',
-        '.md': 'text/markdown',
-        '.txt': 'text/plain'
-    }
-    return mime_types.get(ext, 'application/octet-stream') 
\ No newline at end of file
+    return EXT_TO_MIME.get(ext, 'application/octet-stream')